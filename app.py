@@ -1,13 +1,26 @@
+import os
+from datetime import date, timedelta
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import requests
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from utils import (
     get_current_and_forecast,
     get_historical_weather,
     check_password,
     segmented_palette,
     get_disruption_prediction,
+    get_location_prediction,
     get_amount_disruptions_NS,
+    aggregate_daily_weather,
+    load_prediction_store,
+    lookup_prediction,
+    location_key,
+    RenderProfiler,
+    note_cache_miss,
+    MultiResolution,
 )
 
 
@@ -23,6 +36,7 @@ st.set_page_config(
 # cache functions
 @st.cache_data()
 def cache_current(latitude=None, longitude=None, feature_list=None):
+    note_cache_miss()
     if any([latitude, longitude, feature_list]) is None:
         return get_current_and_forecast()
     else:
@@ -35,6 +49,7 @@ def cache_current(latitude=None, longitude=None, feature_list=None):
 def cache_historical(
     latitude=None, longitude=None, start_date=None, end_date=None, feature_list=None
 ):
+    note_cache_miss()
     if any([latitude, longitude, start_date, end_date, feature_list]) is None:
         return get_historical_weather()
     else:
@@ -47,11 +62,223 @@ def cache_historical(
         )
 
 
+# the model api caches the forecast itself, this only spares reruns the request
+@st.cache_data(ttl=60)
+def cache_location_prediction(latitude, longitude):
+    note_cache_miss()
+    return get_location_prediction(latitude, longitude)
+
+
 @st.cache_data(ttl=60)
 def cache_current_disruptions():
+    note_cache_miss()
     return get_amount_disruptions_NS()
 
 
+@st.cache_data(ttl=60)
+def cache_prediction_store():
+    note_cache_miss()
+    return load_prediction_store()
+
+
+# dashboard stages: fetch -> features -> predictions -> figures, every stage is
+# cached on its own inputs so a rerun only recomputes what actually changed
+@st.cache_data()
+def stage_features(df_current):
+    note_cache_miss()
+    return aggregate_daily_weather(df_current)
+
+
+@st.cache_data()
+def stage_predictions(prepped_df):
+    note_cache_miss()
+    full_pred_df = (
+        pd.concat(
+            [
+                get_disruption_prediction(prepped_df.iloc[i, :])
+                for i in range(prepped_df.shape[0])
+            ]
+        )
+        .astype(float)
+        .reset_index(drop=True)
+        .assign(**{"date": prepped_df.index})
+    )
+    return pd.merge(prepped_df.reset_index(), full_pred_df, on="date")
+
+
+@st.cache_data()
+def stage_forecast_figure(df_current):
+    note_cache_miss()
+    return px.line(
+        df_current.melt(id_vars="time"),
+        x="time",
+        y="value",
+        color="variable",
+        title="Current weather",
+        labels={"time": "Time", "value": "Value", "variable": "Feature"},
+        color_discrete_sequence=segmented_palette,
+    )
+
+
+@st.cache_data()
+def stage_features_figure(prepped_df):
+    note_cache_miss()
+    return px.box(
+        prepped_df.reset_index().melt(id_vars="date"),
+        x="date",
+        y="value",
+        color="variable",
+    )
+
+
+# historical explorer: the hourly history is aggregated once into a
+# multi-resolution pyramid, every zoom only decimates the visible window to
+# the plot width so the browser never receives the full history
+HISTORY_FEATURES = ["temperature_2m", "relativehumidity_2m", "windspeed_10m", "rain"]
+HISTORY_WIDTH_PX = 1200
+
+
+@st.cache_resource(max_entries=8)
+def stage_history_pyramid(latitude, longitude, start_date, end_date):
+    note_cache_miss()
+    return MultiResolution(
+        cache_historical(
+            latitude=latitude,
+            longitude=longitude,
+            start_date=str(start_date),
+            end_date=str(end_date),
+            feature_list=HISTORY_FEATURES,
+        )
+    )
+
+
+@st.cache_data(max_entries=64)
+def stage_history_figure(latitude, longitude, start_date, end_date, window, method):
+    note_cache_miss()
+    plot_df = stage_history_pyramid(latitude, longitude, start_date, end_date).query(
+        str(window[0]),
+        str(window[1] + timedelta(days=1)),
+        width=HISTORY_WIDTH_PX,
+        method=method,
+    )
+    figure = px.line(
+        plot_df,
+        x="time",
+        y="value",
+        color="variable",
+        facet_row="variable",
+        render_mode="webgl",
+        height=180 * len(HISTORY_FEATURES),
+        labels={"time": "Time", "value": "Value", "variable": "Feature"},
+        color_discrete_sequence=segmented_palette,
+    )
+    return figure.update_yaxes(matches=None, title_text="").update_layout(
+        showlegend=False
+    )
+
+
+def location_stages(latitude, longitude, feature_list, profiler):
+    """Forecast, daily features and predictions of one location.
+
+    Precomputed predictions (precompute_predictions.py) are used when the
+    location is in the store, otherwise the model api predicts all days in
+    one request. The live stages only run when the model api can not.
+    """
+    with profiler.stage("prediction store", cached=True):
+        store = cache_prediction_store()
+        stored = lookup_prediction(
+            store, location_key(latitude, longitude, store.get("precision", 2))
+        )
+    if stored is None:
+        with profiler.stage("location prediction", cached=True):
+            try:
+                stored = cache_location_prediction(latitude, longitude)
+            except requests.RequestException:
+                stored = None
+    if stored is not None:
+        df_current, features_prediction_df = stored
+        prepped_df = features_prediction_df.drop(columns="prediction").set_index("date")
+    else:
+        with profiler.stage("fetch", cached=True):
+            df_current = cache_current(
+                latitude=latitude, longitude=longitude, feature_list=feature_list
+            )
+        with profiler.stage("features", cached=True):
+            prepped_df = stage_features(df_current)
+        with profiler.stage("predictions", cached=True):
+            features_prediction_df = stage_predictions(prepped_df)
+    return df_current, prepped_df, features_prediction_df
+
+
+@st.fragment(run_every=60)
+def render_ns_disruptions():
+    st.markdown(
+        f"#### Train disruption prediction in minutes for the Netherlands for today according to NS: :blue[{cache_current_disruptions()}]"
+    )
+
+
+@st.fragment
+def render_chart(figure):
+    st.plotly_chart(figure, use_container_width=True)
+
+
+@st.fragment
+def render_history(latitude, longitude, session_id, profiling):
+    """Opt-in history explorer, its widgets only rerun this fragment.
+
+    Nothing is fetched until the explorer is switched on, so a cold load or
+    a new location does not pay for an archive request.
+    """
+    if not st.toggle("Explore historical weather", value=False):
+        return
+    # a fragment rerun is a render of its own, timed and logged separately
+    profiler = RenderProfiler(session_id=session_id, enabled=profiling)
+    last_day = date.today() - timedelta(days=7)
+    history_range = st.date_input(
+        "History",
+        value=(last_day - timedelta(days=365), last_day),
+        max_value=last_day,
+    )
+    if len(history_range) == 2:
+        history_start, history_end = history_range
+        window = st.slider(
+            "Zoom",
+            min_value=history_start,
+            max_value=history_end,
+            value=(history_start, history_end),
+        )
+        method = st.radio(
+            "Decimation",
+            ["minmax", "lttb"],
+            horizontal=True,
+            label_visibility="collapsed",
+        )
+        with profiler.stage("history figure", cached=True):
+            history_figure = stage_history_figure(
+                latitude, longitude, history_start, history_end, window, method
+            )
+        with profiler.stage("history chart"):
+            st.plotly_chart(history_figure, use_container_width=True)
+    profiler.log()
+
+
+def render_profile(profiler):
+    """Sidebar breakdown of the stage timings of this render."""
+    timings = profiler.frame()
+    st.sidebar.subheader("Render profile")
+    st.sidebar.caption(f"total {profiler.summary()['total_ms']:.0f} ms")
+    st.sidebar.bar_chart(timings, x="stage", y="ms", horizontal=True)
+    st.sidebar.dataframe(timings, hide_index=True)
+
+
+def profiling_requested():
+    """Profiling is opt-in: DASHBOARD_PROFILE=1 or the ?profile=1 query param."""
+    return (
+        os.environ.get("DASHBOARD_PROFILE") == "1"
+        or st.query_params.get("profile") == "1"
+    )
+
+
 # if check_password():
 st.sidebar.title("Settings")
 latitude = st.sidebar.number_input(
@@ -85,28 +312,16 @@ longitude = st.sidebar.number_input(
 
 feature_list = ["temperature_2m", "rain"]
 
-df_current = cache_current(
-    latitude=latitude, longitude=longitude, feature_list=feature_list
+profiling = st.sidebar.checkbox("Profile render", value=profiling_requested())
+ctx = get_script_run_ctx()
+profiler = RenderProfiler(
+    session_id=ctx.session_id if ctx is not None else "unknown", enabled=profiling
 )
 
-prepped_df = (
-    df_current.assign(**{"date": lambda x: pd.to_datetime(x["time"]).dt.date})
-    .groupby("date")
-    .agg({"temperature_2m": ["mean", "min", "max"], "rain": "sum"})
+df_current, prepped_df, features_prediction_df = location_stages(
+    latitude, longitude, feature_list, profiler
 )
-prepped_df.columns = ["_".join(col) for col in prepped_df.columns]
-full_pred_df = (
-    pd.concat(
-        [
-            get_disruption_prediction(prepped_df.iloc[i, :])
-            for i in range(prepped_df.shape[0])
-        ]
-    )
-    .reset_index(drop=True)
-    .assign(**{"date": prepped_df.index})
-)
-
-features_prediction_df = pd.merge(prepped_df.reset_index(), full_pred_df, on="date")
+stored_nl = lookup_prediction(cache_prediction_store(), "NL")
 
 st.title("Disruption Prediction Due to Weather")
 
@@ -115,47 +330,53 @@ st.write(
     and based on the current weather and the forecast, predicts the amount of minutes
     of disruptions predicted."""
 )
-disruption_prediction = (
-    get_disruption_prediction(prepped_df.iloc[0, :]).astype(float).round(2).iloc[0, 0]
-)
-st.markdown(
-    f"#### Train disruption prediction in minutes for the Netherlands for today: :green[{disruption_prediction}]"
-)
+# the headline is the country average of the prediction store, without a store
+# the selected location stands in and the headline says so
+if stored_nl is not None:
+    headline_area = "the Netherlands"
+    headline_df = stored_nl[1]
+else:
+    headline_area = (
+        f"the selected location ({latitude:.2f}, {longitude:.2f}), "
+        "no country average available"
+    )
+    headline_df = features_prediction_df
+disruption_prediction = round(headline_df["prediction"].iloc[0], 2)
 st.markdown(
-    f"#### Train disruption prediction in minutes for the Netherlands for today according to NS: :blue[{cache_current_disruptions()}]"
+    f"#### Train disruption prediction in minutes for {headline_area} for today: :green[{disruption_prediction}]"
 )
+with profiler.stage("NS disruptions", cached=True):
+    render_ns_disruptions()
 st.write("Based on the following weather features:")
-st.write(prepped_df.iloc[[0], :])
+st.write(
+    prepped_df.iloc[[0], :]
+    if stored_nl is None
+    else headline_df.drop(columns="prediction").set_index("date").iloc[[0], :]
+)
 
 # current weather
 st.header("Current weather and 7 day forecast")
-plot_df = df_current.melt(id_vars="time")
-current_line_chart = px.line(
-    plot_df,
-    x="time",
-    y="value",
-    color="variable",
-    title="Current weather",
-    labels={"time": "Time", "value": "Value", "variable": "Feature"},
-    color_discrete_sequence=segmented_palette,
-)
-st.plotly_chart(current_line_chart, use_container_width=True)
-
-plot_df = prepped_df.reset_index().melt(id_vars="date")
-
-current_box_chart = px.box(
-    plot_df,
-    x="date",
-    y="value",
-    color="variable",
-)
+with profiler.stage("forecast figure", cached=True):
+    forecast_figure = stage_forecast_figure(df_current)
+with profiler.stage("forecast chart"):
+    render_chart(forecast_figure)
 
 # prediction_line_chart = px.line(
-#     data_frame=full_pred_df,
+#     data_frame=features_prediction_df,
 #     x="date",
 #     y="prediction",
 # )
 
 st.header("Weather Features used for prediction")
-st.plotly_chart(current_box_chart, use_container_width=True)
+with profiler.stage("features figure", cached=True):
+    features_figure = stage_features_figure(prepped_df)
+with profiler.stage("features chart"):
+    render_chart(features_figure)
 # st.plotly_chart(prediction_line_chart, use_container_width=True)
+
+st.header("Historical weather")
+render_history(latitude, longitude, profiler.session_id, profiling)
+
+if profiling:
+    profiler.log()
+    render_profile(profiler)
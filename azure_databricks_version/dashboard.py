@@ -116,8 +116,9 @@ prepped_df = (
     .agg({"temperature_2m": ["mean", "min", "max"], "rain": "sum"})
 )
 prepped_df.columns = ["_".join(col) for col in prepped_df.columns]
+# all days are scored in one request
 full_pred_df = (
-    pd.concat([score_model(prepped_df.reset_index(drop=True).iloc[[0], :]) for i in range(prepped_df.shape[0])])
+    score_model(prepped_df.reset_index(drop=True))
     .reset_index(drop=True)
     .assign(**{"date": prepped_df.index})
 )
@@ -131,9 +132,7 @@ st.write(
     and based on the current weather and the forecast, predicts the amount of minutes
     of disruptions predicted."""
 )
-disruption_prediction = (
-    score_model(prepped_df.reset_index(drop=True).iloc[[0], :]).astype(float).round(2).iloc[0, 0]
-)
+disruption_prediction = full_pred_df.iloc[:, 0].astype(float).round(2).iloc[0]
 st.markdown(
     f"#### Train disruption prediction in minutes for the Netherlands for today: :green[{disruption_prediction}]"
 )
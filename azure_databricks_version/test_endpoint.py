@@ -3,10 +3,34 @@ import os
 import requests
 import pandas as pd
 import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv, find_dotenv
 
 _ = load_dotenv(find_dotenv())
 
+# url = "https://adb-3715028202055514.14.azuredatabricks.net/serving-endpoints/disruptions_prediction/invocations"
+# url = "https://adb-1846146254154564.4.azuredatabricks.net/serving-endpoints/disruptions_prediction/invocations"
+# url = "https://adb-8041947923484593.13.azuredatabricks.net/serving-endpoints/disruption-prediction/invocations"
+SERVING_URL = os.environ.get(
+    "DATABRICKS_SERVING_URL",
+    "https://adb-5056669161281979.19.azuredatabricks.net/serving-endpoints/disruption-prediction-model/invocations",
+)
+# (connect, read) timeout in seconds
+TIMEOUT = (3.05, 30)
+
+# (scored at, response) per scored payload, shared by all streamlit sessions;
+# expires so a model redeployed at the same url is picked up
+_response_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_response_cache_lock = threading.Lock()
+_RESPONSE_CACHE_SIZE = 1024
+_RESPONSE_CACHE_TTL_S = float(os.environ.get("DATABRICKS_CACHE_TTL_S", 900))
+
 
 # %%
 def create_tf_serving_json(data):
@@ -17,13 +41,36 @@ def create_tf_serving_json(data):
     }
 
 
-def score_model(dataset):
-    # url = "https://adb-3715028202055514.14.azuredatabricks.net/serving-endpoints/disruptions_prediction/invocations"
-    # url = "https://adb-1846146254154564.4.azuredatabricks.net/serving-endpoints/disruptions_prediction/invocations"
-    # url = "https://adb-8041947923484593.13.azuredatabricks.net/serving-endpoints/disruption-prediction/invocations"
-    url = 'https://adb-5056669161281979.19.azuredatabricks.net/serving-endpoints/disruption-prediction-model/invocations'
+@lru_cache(maxsize=None)
+def get_session(retries=3, backoff_factor=0.5):
+    """Pooled session that retries throttled and failed scoring requests."""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        # scoring is idempotent so POST can safely be retried
+        allowed_methods=["POST"],
+        respect_retry_after_header=True,
+        # return the last failed response instead of raising RetryError, so
+        # score_model reports the status and body
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(max_retries=retry, pool_maxsize=10))
+    session.mount("http://", HTTPAdapter(max_retries=retry, pool_maxsize=10))
+    return session
+
+
+def score_model(dataset, url=SERVING_URL, timeout=TIMEOUT, use_cache=True):
+    """Score a data frame (all rows in one request) on the serving endpoint.
+
+    Responses are cached for `_RESPONSE_CACHE_TTL_S` seconds by a hash of
+    the token, url and payload, so repeated reruns with the same features
+    do not call the paid endpoint again.
+    """
+    token = os.environ.get("DATABRICKS_TOKEN")
     headers = {
-        "Authorization": f'Bearer {os.environ.get("DATABRICKS_TOKEN")}',
+        "Authorization": f"Bearer {token}",
         "Content-Type": "application/json",
     }
     ds_dict = (
@@ -31,23 +78,42 @@ def score_model(dataset):
         if isinstance(dataset, pd.DataFrame)
         else create_tf_serving_json(dataset)
     )
-    data_json = json.dumps(ds_dict, allow_nan=True)
-    response = requests.request(method="POST", headers=headers, url=url, data=data_json)
+    data_json = json.dumps(ds_dict, allow_nan=True, default=str)
+    key = hashlib.sha256(f"{token}\n{url}\n{data_json}".encode()).hexdigest()
+    if use_cache:
+        with _response_cache_lock:
+            entry = _response_cache.get(key)
+            if (
+                entry is not None
+                and time.monotonic() - entry[0] <= _RESPONSE_CACHE_TTL_S
+            ):
+                _response_cache.move_to_end(key)
+                return pd.DataFrame(entry[1])
+
+    response = get_session().post(url, headers=headers, data=data_json, timeout=timeout)
     if response.status_code != 200:
         raise Exception(
             f"Request failed with status {response.status_code}, {response.text}"
         )
-    return pd.DataFrame(response.json())
+    body = response.json()
+    if use_cache:
+        with _response_cache_lock:
+            _response_cache[key] = (time.monotonic(), body)
+            _response_cache.move_to_end(key)
+            while len(_response_cache) > _RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+    return pd.DataFrame(body)
 
 
 # %%
-X = pd.DataFrame(
-    {
-        "temperature_2m_mean": [10.0],
-        "temperature_2m_min": [8.0],
-        "temperature_2m_max": [12.0],
-        "rain_sum": [0.0],
-    }
-)
-print(score_model(X))
+if __name__ == "__main__":
+    X = pd.DataFrame(
+        {
+            "temperature_2m_mean": [10.0],
+            "temperature_2m_min": [8.0],
+            "temperature_2m_max": [12.0],
+            "rain_sum": [0.0],
+        }
+    )
+    print(score_model(X))
 # %%
@@ -0,0 +1,156 @@
+"""Measure what a Streamlit rerun of app.py costs.
+
+The app is run headless with `streamlit.testing`, once cold and then for
+typical reruns. Upstream calls (open-meteo, NS and model api) are counted;
+with --offline they are answered with synthetic payloads so the numbers only
+reflect the dashboard itself.
+
+    python benchmarks/app_rerun_cost.py --offline --repeat 5
+    python benchmarks/app_rerun_cost.py --store prediction_store.json
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+calls = Counter()
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, body):
+        self._body = body
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        pass
+
+
+def _synthetic(method, url):
+    if "open-meteo" in url:
+        query = parse_qs(urlparse(url).query)
+        if "start_date" in query:
+            time_index = pd.date_range(
+                query["start_date"][0], f"{query['end_date'][0]} 23:00", freq="h"
+            )
+        else:
+            time_index = pd.date_range(
+                pd.Timestamp.today().normalize(), periods=7 * 24, freq="h"
+            )
+        hour = np.arange(len(time_index))
+        return _Response(
+            {
+                "hourly": {
+                    "time": time_index.strftime("%Y-%m-%dT%H:%M").tolist(),
+                    "temperature_2m": (12 + 5 * np.sin(hour / 24 * 2 * np.pi))
+                    .round(1)
+                    .tolist(),
+                    "rain": ((hour % 17) == 0).astype(float).tolist(),
+                }
+            }
+        )
+    if "predict_location" in url:
+        from utils import aggregate_daily_weather
+
+        hourly = _synthetic(method, "https://api.open-meteo.com/v1/forecast")._body
+        daily = aggregate_daily_weather(pd.DataFrame(hourly["hourly"]))
+        return _Response(
+            {
+                "hourly": hourly["hourly"],
+                "daily": {
+                    "date": [str(d) for d in daily.index],
+                    **daily.to_dict(orient="list"),
+                    "prediction": [250.0] * len(daily),
+                },
+            }
+        )
+    if "predict" in url:
+        return _Response({"prediction": "250.0"})
+    return _Response([])
+
+
+def _counting(method, real):
+    def call(url, *args, **kwargs):
+        host = url.split("/")[2]
+        calls[f"{method} {host}"] += 1
+        if offline:
+            return _synthetic(method, url)
+        return real(url, *args, **kwargs)
+
+    return call
+
+
+offline = False
+
+
+def timed_run(at):
+    calls.clear()
+    start = time.perf_counter()
+    at.run()
+    seconds = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return seconds, sum(calls.values())
+
+
+def main():
+    global offline
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offline", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--store",
+        default="missing_prediction_store.json",
+        help="prediction store to use, by default the live path is measured",
+    )
+    args = parser.parse_args()
+    offline = args.offline
+
+    scenarios = {
+        "cold start": lambda at: at,
+        "rerun, same inputs": lambda at: at,
+        "rerun, new latitude": lambda at: at.sidebar.number_input[0].increment(),
+        "rerun, previous latitude": lambda at: at.sidebar.number_input[0].decrement(),
+        "history explorer on": lambda at: at.toggle[0].set_value(True),
+    }
+    os.environ["PREDICTION_STORE"] = args.store
+    patch_get = mock.patch.object(requests, "get", _counting("GET", requests.get))
+    patch_post = mock.patch.object(requests, "post", _counting("POST", requests.post))
+    with patch_get, patch_post:
+        results = {name: [] for name in scenarios}
+        for _ in range(args.repeat):
+            # every repeat starts with empty caches
+            st.cache_data.clear()
+            st.cache_resource.clear()
+            at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+            for name, interact in scenarios.items():
+                interact(at)
+                results[name].append(timed_run(at))
+
+    print(f"{'scenario':<34}{'median ms':>10}{'max ms':>10}{'upstream calls':>16}")
+    for name, runs in results.items():
+        seconds = [s for s, _ in runs]
+        print(
+            f"{name:<34}{statistics.median(seconds) * 1000:>10.1f}"
+            f"{max(seconds) * 1000:>10.1f}{runs[-1][1]:>16}"
+        )
+
+
+if __name__ == "__main__":
+    main()
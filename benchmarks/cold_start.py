@@ -0,0 +1,74 @@
+"""Measure the cold start of the model api.
+
+Starts uvicorn the way the container does and records the time from
+process start until /readyz answers and until the first prediction is
+served. Exits with 1 when the median exceeds the budget.
+
+    python benchmarks/cold_start.py --repeat 5 --budget 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+MODEL_API = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model_api")
+
+
+def cold_start(port, timeout=60):
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        cwd=MODEL_API,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        while True:
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError("model api did not become ready")
+            try:
+                if requests.get(f"{base_url}/readyz", timeout=1).status_code == 200:
+                    break
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.02)
+        ready = time.perf_counter() - start
+
+        response = requests.post(f"{base_url}/predict_prepped_data", json={})
+        response.raise_for_status()
+        first_prediction = time.perf_counter() - start
+        return ready, first_prediction, requests.get(f"{base_url}/readyz").json()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=10.0, help="seconds")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.repeat):
+        ready, first_prediction, status = cold_start(args.port)
+        runs.append(first_prediction)
+        print(
+            f"ready after {ready:.2f}s, first prediction after {first_prediction:.2f}s "
+            f"(server side: ready {status['ready_after_s']}s, "
+            f"first prediction {status['first_prediction_after_s']}s)"
+        )
+
+    median = statistics.median(runs)
+    print(f"median time to first prediction {median:.2f}s, budget {args.budget:.2f}s")
+    sys.exit(0 if median <= args.budget else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Time the vectorized autoregressive forecaster on many synthetic series.
+
+python benchmarks/forecasting.py --series 10 100 500 --days 90 --lags 24
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from utils import fit_autoregressive, forecast_autoregressive  # noqa: E402
+
+
+def synthetic_stations(n_series, n_hours, seed=42):
+    """Hourly temperature and rain of `n_series` stations."""
+    rng = np.random.default_rng(seed)
+    hour = np.arange(n_hours)
+    daily = 4 * np.sin(2 * np.pi * (hour - 9) / 24)
+    temperature = (
+        rng.normal(10, 3, (n_series, 1)) + daily + rng.normal(0, 1, (n_series, n_hours))
+    )
+    rain = np.where(
+        rng.random((n_series, n_hours)) < 0.1, rng.gamma(1, 1.2, (n_series, n_hours)), 0
+    )
+    return np.stack([temperature, rain], axis=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--series", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--lags", type=int, default=24)
+    parser.add_argument("--steps", type=int, default=7 * 24)
+    args = parser.parse_args()
+
+    rows = []
+    for n_series in args.series:
+        values = synthetic_stations(n_series, args.days * 24)
+        start = time.perf_counter()
+        model = fit_autoregressive(values, lags=args.lags)
+        fitted = time.perf_counter()
+        forecast_autoregressive(model, values, args.steps)
+        done = time.perf_counter()
+        rows.append(
+            {
+                "series": n_series,
+                "hours": args.days * 24,
+                "fit_ms": (fitted - start) * 1000,
+                "forecast_ms": (done - fitted) * 1000,
+                "ms_per_series": (done - start) * 1000 / n_series,
+            }
+        )
+    print(pd.DataFrame(rows).round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
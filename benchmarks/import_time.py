@@ -0,0 +1,104 @@
+"""Measure and limit the import (cold start) cost of the entry points.
+
+For every entry point the module level imports are collected with `ast` and
+executed in a fresh interpreter, so the script itself (training, streamlit
+rendering, ...) does not run. The model api is imported as a whole because
+loading the model is part of its startup. Exits with 1 when an entry point
+exceeds its budget.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget app.py=2.5 --repeat 5
+"""
+import argparse
+import ast
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# entry point -> (working directory, budget in seconds)
+ENTRY_POINTS = {
+    "app.py": (ROOT, 3.0),
+    "ml.py": (ROOT, 4.0),
+    "model_api/main.py": (os.path.join(ROOT, "model_api"), 2.0),
+}
+
+
+def import_statements(path):
+    """Module level import statements of a script, without running it."""
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    return "\n".join(
+        ast.unparse(node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def measure(code, cwd):
+    """Wall time of a fresh interpreter running `code` and its top imports."""
+    wrapped = (
+        "import time; _start = time.perf_counter()\n"
+        f"{code}\n"
+        "print('__elapsed__', time.perf_counter() - _start)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", wrapped],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    seconds = float(re.search(r"__elapsed__ (\S+)", result.stdout).group(1))
+
+    # "import time: self [us] | cumulative | imported package", top level only
+    top = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S.*)$", line)
+        if match and not match.group(2).startswith(" "):
+            top.append((int(match.group(1)) / 1e6, match.group(2)))
+    return seconds, sorted(top, reverse=True)[:5]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="ENTRY=SECONDS",
+        help="override the budget of an entry point",
+    )
+    args = parser.parse_args()
+
+    budgets = {name: budget for name, (_, budget) in ENTRY_POINTS.items()}
+    for item in args.budget:
+        name, seconds = item.split("=")
+        budgets[name] = float(seconds)
+
+    failed = []
+    for name, (cwd, _) in ENTRY_POINTS.items():
+        if name == "model_api/main.py":
+            code = "import main"
+        else:
+            code = import_statements(os.path.join(ROOT, name))
+        runs = [measure(code, cwd) for _ in range(args.repeat)]
+        seconds = statistics.median(s for s, _ in runs)
+        status = "ok" if seconds <= budgets[name] else "OVER BUDGET"
+        print(f"{name:<20}{seconds:>8.2f}s  budget {budgets[name]:.2f}s  {status}")
+        for cumulative, module in runs[-1][1]:
+            print(f"    {cumulative:>6.2f}s  {module}")
+        if status != "ok":
+            failed.append(name)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
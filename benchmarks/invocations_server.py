@@ -0,0 +1,83 @@
+"""Local stand-in for a Databricks model serving endpoint.
+
+Implements the `/invocations` protocol used by
+azure_databricks_version/test_endpoint.py: a POST with a `dataframe_split`
+payload answered with `{"predictions": [...]}`, scored with the same
+xgboost model as model_api. Lets the serving benchmark run offline.
+
+    python benchmarks/invocations_server.py --port 5001 --latency-ms 20
+"""
+
+import argparse
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import xgboost as xgb
+
+MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "model_api", "xgb.model"
+)
+
+
+def make_handler(model, latency_s=0.0):
+    class InvocationsHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # headers and body are written separately, avoid delayed ack stalls
+        disable_nagle_algorithm = True
+
+        def _reply(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/invocations":
+                return self._reply(404, {"error_code": "NOT_FOUND"})
+            try:
+                length = int(self.headers["Content-Length"])
+                split = json.loads(self.rfile.read(length))["dataframe_split"]
+                df = pd.DataFrame(split["data"], columns=split["columns"])
+            except (KeyError, TypeError, ValueError) as e:
+                error = {"error_code": "BAD_REQUEST", "message": str(e)}
+                return self._reply(400, error)
+            # emulated network/gateway overhead of the managed endpoint
+            time.sleep(latency_s)
+            predictions = model.predict(xgb.DMatrix(df))
+            self._reply(200, {"predictions": predictions.astype(float).tolist()})
+
+        def log_message(self, *args):
+            pass
+
+    return InvocationsHandler
+
+
+def serve(port=5001, latency_ms=0.0, model_path=MODEL_PATH):
+    model = xgb.Booster()
+    model.load_model(model_path)
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port), make_handler(model, latency_ms / 1000)
+    )
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency_ms, args.model)
+    print(f"serving /invocations on http://127.0.0.1:{args.port}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Overload benchmark of the model_api admission control.
+
+Starts model_api twice, once with the default bounded inference queue and
+once with an effectively unbounded one, and hammers /predict_prepped_data
+with an increasing number of concurrent sessions. Reports the latency of
+the accepted requests as seen by the client and by the server (its
+`Server-Timing` header, the time the deadline applies to) and the share of
+rejected (429/503) ones.
+
+Sessions wait for the `Retry-After` of a rejection (1 s when uvicorn's
+`--limit-concurrency` answered without one) before their next request,
+with some jitter, like well behaved clients. `--ignore-retry-after` retries right
+away instead, a retry storm that mostly measures how fast the server (and,
+on a small machine, the benchmark itself) can answer rejections.
+
+    python benchmarks/overload.py --sessions 1 8 32 128 --seconds 5
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS)
+
+from serving_benchmark import FEATURES, MODEL_API, wait_until_up  # noqa: E402
+
+CONFIGS = {
+    "bounded": {},
+    "unbounded": {"INFERENCE_QUEUE_DEPTH": "1000000", "INFERENCE_DEADLINE_MS": "1e9"},
+}
+
+
+def hammer(url, sessions, seconds, honor_retry_after=True):
+    row = FEATURES.iloc[0].to_dict()
+    stop = time.perf_counter() + seconds
+
+    def session(_):
+        http = requests.Session()
+        latencies, server_ms, statuses = [], [], Counter()
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            response = http.post(f"{url}/predict_prepped_data", json=row, timeout=60)
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+                server_ms.append(
+                    float(response.headers["Server-Timing"].split("dur=")[1])
+                )
+            elif honor_retry_after:
+                wait = float(response.headers.get("Retry-After", 1))
+                wait *= random.uniform(1, 1.5)
+                time.sleep(max(0.0, min(wait, stop - time.perf_counter())))
+        return latencies, server_ms, statuses
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(session, range(sessions)))
+    latencies = np.array([lat for lats, _, _ in results for lat in lats])
+    server_ms = np.array([ms for _, mss, _ in results for ms in mss])
+    statuses = sum((s for _, _, s in results), Counter())
+    return latencies, server_ms, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--concurrency", default="2", help="INFERENCE_CONCURRENCY")
+    parser.add_argument("--queue-depth", default="8", help="INFERENCE_QUEUE_DEPTH")
+    parser.add_argument("--deadline-ms", default="250", help="INFERENCE_DEADLINE_MS")
+    parser.add_argument(
+        "--limit-concurrency",
+        default="256",
+        help="uvicorn --limit-concurrency, open connections before answering 503",
+    )
+    parser.add_argument("--ignore-retry-after", action="store_true")
+    args = parser.parse_args()
+
+    rows = []
+    for config, overrides in CONFIGS.items():
+        env = {
+            **os.environ,
+            "INFERENCE_CONCURRENCY": args.concurrency,
+            "INFERENCE_QUEUE_DEPTH": args.queue_depth,
+            "INFERENCE_DEADLINE_MS": args.deadline_ms,
+            **overrides,
+        }
+        server = subprocess.Popen(
+            [
+                *[sys.executable, "-m", "uvicorn", "main:app", "--port", "8000"],
+                *["--limit-concurrency", args.limit_concurrency],
+            ],
+            cwd=MODEL_API,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_up("http://127.0.0.1:8000/readyz")
+            for sessions in args.sessions:
+                latencies, server_ms, statuses = hammer(
+                    "http://127.0.0.1:8000",
+                    sessions,
+                    args.seconds,
+                    honor_retry_after=not args.ignore_retry_after,
+                )
+                total = sum(statuses.values())
+                rows.append(
+                    {
+                        "config": config,
+                        "sessions": sessions,
+                        "accepted_per_s": len(latencies) / args.seconds,
+                        "rejected_pct": 100 * (total - statuses[200]) / total,
+                        "p50_ms": np.percentile(latencies, 50) * 1000,
+                        "p99_ms": np.percentile(latencies, 99) * 1000,
+                        "max_ms": latencies.max() * 1000,
+                        "server_p99_ms": np.percentile(server_ms, 99),
+                    }
+                )
+                print(rows[-1], flush=True)
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(pd.DataFrame(rows).round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""End-to-end data pipeline benchmark against the replay server.
+
+Times every stage of the dashboard path (forecast fetch -> parse -> daily
+features -> 7 predictions from model_api, the same in one request through
+/predict_location, plus the NS figure) and of the training path (disruption
+csv -> ERA5 fetch -> parse -> daily features -> fit/predict) without network
+access. Time spent inside `requests` is reported as "fetch", the remainder of
+a client call as "parse".
+
+    python benchmarks/pipeline_e2e.py --repeat 10 --latency-ms 50 --size 4
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import requests
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCHMARKS, "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS)
+
+import replay_server  # noqa: E402
+
+timings = defaultdict(list)
+_fetch_seconds = [0.0]
+
+
+def _timed_requests(fn):
+    def call(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _fetch_seconds[0] += time.perf_counter() - start
+
+    return call
+
+
+@contextmanager
+def stage(path, name, split=True):
+    _fetch_seconds[0] = 0.0
+    start = time.perf_counter()
+    yield
+    total = time.perf_counter() - start
+    if split and _fetch_seconds[0]:
+        timings[(path, f"{name}: fetch")].append(_fetch_seconds[0])
+        timings[(path, f"{name}: parse")].append(total - _fetch_seconds[0])
+    else:
+        timings[(path, name)].append(total)
+
+
+def dashboard_path(utils):
+    with stage("dashboard", "forecast"):
+        df_current = utils.get_current_and_forecast(
+            lat=52.3116485, lon=4.9451244, feature_list=["temperature_2m", "rain"]
+        )
+    with stage("dashboard", "daily features"):
+        prepped_df = utils.aggregate_daily_weather(df_current)
+    with stage("dashboard", "predictions"):
+        pd.concat(
+            [
+                utils.get_disruption_prediction(prepped_df.iloc[i, :])
+                for i in range(prepped_df.shape[0])
+            ]
+        )
+    with stage("dashboard", "predict_location (one request)"):
+        utils.get_location_prediction(lat=52.3116485, lon=4.9451244)
+    with stage("dashboard", "NS disruptions"):
+        utils.get_amount_disruptions_NS()
+
+
+def training_path(utils):
+    import xgboost as xgb
+
+    with stage("training", "disruption csv"):
+        disruptions = utils.load_disruptions(os.path.join(ROOT, "data", "*.csv"))
+    start_date = str(disruptions["start_time"].min().date())
+    end_date = str(disruptions["start_time"].max().date())
+    with stage("training", "ERA5 history"):
+        weather = utils.get_historical_weather(
+            lat=52.520008, lon=13.404954, start_date=start_date, end_date=end_date
+        )
+    with stage("training", "daily features"):
+        daily = utils.disruption_minutes(disruptions).to_frame()
+        daily.index = daily.index.date
+        df = (
+            daily
+            .join(utils.aggregate_daily_weather(weather), how="left")
+            .loc[lambda x: x["duration_minutes"] < 20000]
+            .dropna()
+        )
+    with stage("training", "fit + predict"):
+        X = df.drop(columns=["duration_minutes"])
+        model = xgb.XGBRegressor(n_estimators=100, max_depth=5, random_state=42)
+        model.fit(X, df["duration_minutes"])
+        model.predict(X)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--size", type=int, default=1)
+    parser.add_argument(
+        "--no-model-api",
+        action="store_true",
+        help="do not start model_api, use the one already on localhost:8000",
+    )
+    args = parser.parse_args()
+
+    server = replay_server.start(args.port, args.latency_ms, args.jitter_ms, args.size)
+    # the clients read their urls and rate limits at import
+    os.environ.update(replay_server.client_env(args.port))
+    os.environ.update({"OPEN_METEO_RATE": "1e6", "NS_API_RATE": "1e6"})
+    import utils
+
+    model_api = None
+    if not args.no_model_api:
+        model_api = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", "8000"],
+            cwd=os.path.join(ROOT, "model_api"),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        from serving_benchmark import wait_until_up
+
+        wait_until_up("http://127.0.0.1:8000/readyz")
+
+    requests.get = _timed_requests(requests.get)
+    requests.post = _timed_requests(requests.post)
+    try:
+        for _ in range(args.repeat):
+            for path in [dashboard_path, training_path]:
+                with stage(path.__name__.split("_")[0], "total", split=False):
+                    path(utils)
+    finally:
+        server.shutdown()
+        if model_api is not None:
+            model_api.terminate()
+            model_api.wait()
+
+    rows = [
+        {
+            "path": path,
+            "stage": name,
+            "median_ms": np.median(seconds) * 1000,
+            "p95_ms": np.percentile(seconds, 95) * 1000,
+        }
+        for (path, name), seconds in timings.items()
+    ]
+    print(pd.DataFrame(rows).round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
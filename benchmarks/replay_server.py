@@ -0,0 +1,287 @@
+"""Local replay server for the open-meteo and NS apis.
+
+Serves recorded forecast, ERA5 archive and NS payloads from
+benchmarks/fixtures/ so the data functions in `utils` can be timed and
+tested without network access. Point the clients at it with
+
+    OPEN_METEO_FORECAST_URL=http://127.0.0.1:8099/v1/forecast
+    OPEN_METEO_ARCHIVE_URL=http://127.0.0.1:8099/v1/era5
+    NS_API_URL=http://127.0.0.1:8099/reisinformatie-api
+
+Record real payloads once (needs network and NS_APP_PRIMARY):
+
+    python benchmarks/replay_server.py --record
+
+Without recordings, deterministic synthetic payloads with the same shape
+are generated. `--latency-ms` delays every response and `--size` multiplies
+the NS disruptions and the forecast length.
+
+    python benchmarks/replay_server.py --port 8099 --latency-ms 80 --size 4
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+HOURLY_FORECAST = [
+    "temperature_2m",
+    "relativehumidity_2m",
+    "windspeed_10m",
+    "precipitation_probability",
+    "rain",
+]
+HOURLY_ARCHIVE = ["temperature_2m", "relativehumidity_2m", "windspeed_10m", "rain"]
+RECORD_URLS = {
+    "forecast": "https://api.open-meteo.com/v1/forecast?latitude=52.377956&longitude=4.897070"
+    f"&hourly={','.join(HOURLY_FORECAST)}",
+    "era5": "https://archive-api.open-meteo.com/v1/era5?latitude=52.377956&longitude=4.897070"
+    f"&start_date=2021-01-01&end_date=2021-12-31&hourly={','.join(HOURLY_ARCHIVE)}",
+    "disruptions": "https://gateway.apiportal.ns.nl/reisinformatie-api/api/v3/disruptions?isActive=false",
+    "stations": "https://gateway.apiportal.ns.nl/reisinformatie-api/api/v2/stations",
+}
+
+
+def _hourly_weather(times, features, seed):
+    rng = np.random.default_rng(seed)
+    hour = np.arange(len(times))
+    day = hour / 24
+    synthetic = {
+        "temperature_2m": 10
+        + 8 * np.sin(2 * np.pi * (day - 110) / 365)
+        + 4 * np.sin(2 * np.pi * (hour - 9) / 24)
+        + rng.normal(0, 1.5, len(hour)),
+        "relativehumidity_2m": np.clip(80 + rng.normal(0, 10, len(hour)), 20, 100),
+        "windspeed_10m": np.abs(rng.normal(15, 7, len(hour))),
+        "precipitation_probability": rng.integers(0, 100, len(hour)),
+        "rain": np.where(rng.random(len(hour)) < 0.1, rng.gamma(1, 1.2, len(hour)), 0),
+    }
+    return {
+        "time": times.strftime("%Y-%m-%dT%H:%M").tolist(),
+        **{f: np.round(synthetic[f], 1).tolist() for f in features},
+    }
+
+
+def synthesize_fixtures():
+    """Payloads with the shape of the real apis, used when none were recorded."""
+    forecast_times = pd.date_range(
+        pd.Timestamp.today().normalize(), periods=7 * 24, freq="h"
+    )
+    archive_times = pd.date_range("2021-01-01", "2021-12-31 23:00", freq="h")
+    now = pd.Timestamp.now(tz="Europe/Amsterdam").floor("min")
+    rnd = random.Random(42)
+    causes = ["defecte trein", "seinstoring", "wisselstoring", "weersomstandigheden"]
+    disruptions = []
+    for i in range(40):
+        start = now.normalize() + pd.Timedelta(minutes=rnd.randint(0, 22 * 60))
+        end = start + pd.Timedelta(minutes=rnd.randint(5, 300))
+        disruptions.append(
+            {
+                "id": str(7000000 + i),
+                "title": f"Synthetic disruption {i}",
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "timespans": [{"cause": {"label": rnd.choice(causes)}}],
+            }
+        )
+    codes = ["ASD", "UT", "RTD", "GVC", "EHV", "GN", "ZL", "AH", "MT", "AMF"]
+    stations = {
+        "payload": [
+            {
+                "code": code,
+                "lat": round(rnd.uniform(50.8, 53.4), 5),
+                "lng": round(rnd.uniform(3.5, 7.1), 5),
+            }
+            for code in codes
+        ]
+    }
+    return {
+        "forecast": {"hourly": _hourly_weather(forecast_times, HOURLY_FORECAST, 1)},
+        "era5": {"hourly": _hourly_weather(archive_times, HOURLY_ARCHIVE, 2)},
+        "disruptions": disruptions,
+        "stations": stations,
+    }
+
+
+def load_fixtures():
+    fixtures = synthesize_fixtures()
+    for name in fixtures:
+        path = os.path.join(FIXTURES, f"{name}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                fixtures[name] = json.load(f)
+    return fixtures
+
+
+def record():
+    """Store real api responses in benchmarks/fixtures/."""
+    from dotenv import load_dotenv, find_dotenv
+
+    load_dotenv(find_dotenv())
+    os.makedirs(FIXTURES, exist_ok=True)
+    headers = {"Ocp-Apim-Subscription-Key": os.environ.get("NS_APP_PRIMARY", "")}
+    for name, url in RECORD_URLS.items():
+        response = requests.get(url, headers=headers, timeout=60)
+        response.raise_for_status()
+        with open(os.path.join(FIXTURES, f"{name}.json"), "w") as f:
+            json.dump(response.json(), f)
+        print(f"recorded {name}")
+
+
+class Replay:
+    """Builds responses for a request from the fixtures."""
+
+    def __init__(self, fixtures, size=1):
+        self.fixtures = fixtures
+        self.size = size
+
+    def _hourly(self, recorded, features, times):
+        """Recorded hourly values replayed (cyclically) onto `times`."""
+        n = len(recorded["time"])
+        index = np.arange(len(times)) % n
+        hourly = {"time": times.strftime("%Y-%m-%dT%H:%M").tolist()}
+        for feature in features:
+            values = np.asarray(recorded.get(feature, [0.0] * n), dtype=object)
+            hourly[feature] = values[index].tolist()
+        return hourly
+
+    def _per_location(self, query, hourly):
+        lats = query["latitude"][0].split(",")
+        lons = query["longitude"][0].split(",")
+        bodies = [
+            {"latitude": float(lat), "longitude": float(lon), "hourly": hourly}
+            for lat, lon in zip(lats, lons)
+        ]
+        # like open-meteo: an object for one location, a list for several
+        return bodies[0] if len(bodies) == 1 else bodies
+
+    def forecast(self, query):
+        features = query["hourly"][0].split(",")
+        # replayed forecasts always start today
+        times = pd.date_range(
+            pd.Timestamp.today().normalize(), periods=7 * 24 * self.size, freq="h"
+        )
+        hourly = self._hourly(self.fixtures["forecast"]["hourly"], features, times)
+        return self._per_location(query, hourly)
+
+    def era5(self, query):
+        features = query["hourly"][0].split(",")
+        times = pd.date_range(
+            query["start_date"][0], f"{query['end_date'][0]} 23:00", freq="h"
+        )
+        hourly = self._hourly(self.fixtures["era5"]["hourly"], features, times)
+        return self._per_location(query, hourly)
+
+    def disruptions(self, query):
+        # shift the recorded day onto today, repeat `size` times with new ids
+        recorded = self.fixtures["disruptions"]
+        starts = [pd.Timestamp(d["start"]) for d in recorded]
+        shift = pd.Timestamp.now(tz=starts[0].tz).normalize() - min(starts).normalize()
+        body = []
+        for copy in range(self.size):
+            for d in recorded:
+                body.append(
+                    {
+                        **d,
+                        "id": f"{d['id']}-{copy}",
+                        "start": (pd.Timestamp(d["start"]) + shift).isoformat(),
+                        "end": (pd.Timestamp(d["end"]) + shift).isoformat(),
+                    }
+                )
+        return body
+
+    def stations(self, query):
+        return self.fixtures["stations"]
+
+    def route(self, path):
+        return {
+            "/v1/forecast": self.forecast,
+            "/v1/era5": self.era5,
+            "/reisinformatie-api/api/v3/disruptions": self.disruptions,
+            "/reisinformatie-api/api/v2/stations": self.stations,
+        }.get(path.rstrip("/"))
+
+
+def make_handler(replay, latency_s=0.0, jitter_s=0.0):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            handler = replay.route(url.path)
+            if handler is None:
+                status, body = 404, {"error": True, "reason": "not recorded"}
+            else:
+                status, body = 200, handler(parse_qs(url.query))
+            time.sleep(max(0.0, latency_s + random.uniform(-jitter_s, jitter_s)))
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return ReplayHandler
+
+
+def start(port=8099, latency_ms=0.0, jitter_ms=0.0, size=1):
+    """Start the replay server in a background thread, returns the server."""
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port),
+        make_handler(
+            Replay(load_fixtures(), size), latency_ms / 1000, jitter_ms / 1000
+        ),
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def client_env(port=8099):
+    """Environment variables pointing the utils clients at the replay server."""
+    base_url = f"http://127.0.0.1:{port}"
+    return {
+        "OPEN_METEO_FORECAST_URL": f"{base_url}/v1/forecast",
+        "OPEN_METEO_ARCHIVE_URL": f"{base_url}/v1/era5",
+        "NS_API_URL": f"{base_url}/reisinformatie-api",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--size", type=int, default=1, help="payload size multiplier")
+    parser.add_argument("--record", action="store_true")
+    args = parser.parse_args()
+
+    if args.record:
+        return record()
+    server = start(args.port, args.latency_ms, args.jitter_ms, args.size)
+    print(f"replaying on http://127.0.0.1:{args.port}", flush=True)
+    for name, value in client_env(args.port).items():
+        print(f"export {name}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
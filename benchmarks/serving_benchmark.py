@@ -0,0 +1,254 @@
+"""Head-to-head serving benchmark: model_api vs a Databricks style endpoint.
+
+Every backend gets identical workloads built from the same feature rows:
+
+- single: one row per call (today's prediction)
+- batch: the 7 forecast days (what a dashboard page needs)
+- concurrent: N sessions requesting the 7 day batch at the same time
+
+and reports latency percentiles, throughput and the cost per 1k predictions
+derived from the hourly price of each backend.
+
+    # offline, starts model_api and the local /invocations stand-in
+    python benchmarks/serving_benchmark.py --start-local
+
+    # against deployed services
+    python benchmarks/serving_benchmark.py \\
+        --backend model_api=http://localhost:8000 \\
+        --backend invocations=https://<workspace>/serving-endpoints/<name>/invocations \\
+        --cost model_api=0.10 --cost invocations=0.55
+"""
+
+import abc
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+MODEL_API = os.path.join(BENCHMARKS, "..", "model_api")
+
+FEATURES = pd.DataFrame(
+    {
+        "temperature_2m_mean": [10.2, 11.5, 9.8, 8.1, 12.3, 14.0, 13.2],
+        "temperature_2m_min": [6.1, 7.0, 5.5, 3.9, 8.2, 9.5, 9.0],
+        "temperature_2m_max": [14.0, 15.8, 13.1, 11.7, 16.0, 18.4, 17.1],
+        "rain_sum": [0.0, 2.4, 7.9, 0.3, 0.0, 1.1, 12.6],
+    }
+)
+
+
+class Backend(abc.ABC):
+    """A serving backend, `predict` returns one prediction per row."""
+
+    name = "backend"
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        # one pooled session per benchmark thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    @abc.abstractmethod
+    def predict(self, df):
+        """Predictions of all rows of `df`."""
+
+
+class ModelApiBackend(Backend):
+    """model_api, one POST /predict_prepped_data per row."""
+
+    name = "model_api"
+
+    def predict(self, df):
+        predictions = []
+        for row in df.to_dict(orient="records"):
+            response = self.session.post(
+                f"{self.url}/predict_prepped_data", json=row, timeout=30
+            )
+            response.raise_for_status()
+            predictions.append(float(response.json()["prediction"]))
+        return predictions
+
+
+class InvocationsBackend(Backend):
+    """Databricks model serving protocol, all rows in one dataframe_split."""
+
+    name = "invocations"
+
+    def predict(self, df):
+        headers = {"Content-Type": "application/json"}
+        if os.environ.get("DATABRICKS_TOKEN"):
+            headers["Authorization"] = f'Bearer {os.environ["DATABRICKS_TOKEN"]}'
+        response = self.session.post(
+            self.url,
+            data=json.dumps({"dataframe_split": df.to_dict(orient="split")}),
+            headers=headers,
+            timeout=30,
+        )
+        response.raise_for_status()
+        return response.json()["predictions"]
+
+
+BACKENDS = {
+    ModelApiBackend.name: ModelApiBackend,
+    InvocationsBackend.name: InvocationsBackend,
+}
+
+
+def run_workload(backend, df, calls, sessions=1):
+    """Latencies (s) of `calls` predict calls spread over `sessions` threads."""
+
+    def session(n_calls):
+        latencies = []
+        for _ in range(n_calls):
+            start = time.perf_counter()
+            backend.predict(df)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    per_session = [calls // sessions + (i < calls % sessions) for i in range(sessions)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        latencies = [lat for lats in pool.map(session, per_session) for lat in lats]
+    return np.array(latencies), time.perf_counter() - start
+
+
+def summarize(name, workload, df, latencies, wall, cost_per_hour):
+    predictions_per_s = len(latencies) * len(df) / wall
+    return {
+        "backend": name,
+        "workload": workload,
+        "calls": len(latencies),
+        "p50_ms": np.percentile(latencies, 50) * 1000,
+        "p95_ms": np.percentile(latencies, 95) * 1000,
+        "p99_ms": np.percentile(latencies, 99) * 1000,
+        "max_ms": latencies.max() * 1000,
+        "calls_per_s": len(latencies) / wall,
+        "predictions_per_s": predictions_per_s,
+        # cost of keeping the backend up for the time 1k predictions take
+        "usd_per_1k_predictions": (
+            cost_per_hour / 3600 / predictions_per_s * 1000
+            if cost_per_hour is not None
+            else np.nan
+        ),
+    }
+
+
+def wait_until_up(url, timeout=60):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise TimeoutError(f"{url} did not come up")
+
+
+def start_local(latency_ms):
+    """Start model_api and the /invocations stand-in as subprocesses."""
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", "8000"],
+            cwd=MODEL_API,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        ),
+        subprocess.Popen(
+            [
+                sys.executable,
+                os.path.join(BENCHMARKS, "invocations_server.py"),
+                "--port",
+                "5001",
+                "--latency-ms",
+                str(latency_ms),
+            ],
+            stdout=subprocess.DEVNULL,
+        ),
+    ]
+    wait_until_up("http://127.0.0.1:8000/readyz")
+    wait_until_up("http://127.0.0.1:5001/")
+    return processes, {
+        "model_api": "http://127.0.0.1:8000",
+        "invocations": "http://127.0.0.1:5001/invocations",
+    }
+
+
+def parse_pairs(items, cast=str):
+    return {k: cast(v) for k, v in (item.split("=", 1) for item in items)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--backend", action="append", default=[], metavar="NAME=URL")
+    parser.add_argument(
+        "--cost", action="append", default=[], metavar="NAME=USD_PER_HOUR"
+    )
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--start-local", action="store_true")
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="emulated gateway latency of the local /invocations stand-in",
+    )
+    parser.add_argument("--out", help="optional csv file for the results")
+    args = parser.parse_args()
+
+    processes = []
+    urls = parse_pairs(args.backend)
+    if args.start_local:
+        processes, local_urls = start_local(args.latency_ms)
+        urls = {**local_urls, **urls}
+    if not urls:
+        parser.error("pass --backend NAME=URL or --start-local")
+    costs = parse_pairs(args.cost, float)
+
+    workloads = {
+        "single": (FEATURES.iloc[[0]], 1),
+        "batch": (FEATURES, 1),
+        "concurrent": (FEATURES, args.sessions),
+    }
+    results = []
+    try:
+        for name, url in urls.items():
+            backend = BACKENDS[name](url)
+            backend.predict(FEATURES)  # warm connections
+            for workload, (df, sessions) in workloads.items():
+                latencies, wall = run_workload(backend, df, args.calls, sessions)
+                results.append(
+                    summarize(name, workload, df, latencies, wall, costs.get(name))
+                )
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    results_df = pd.DataFrame(results)
+    print(
+        results_df.round(2)
+        .assign(usd_per_1k_predictions=results_df["usd_per_1k_predictions"].round(6))
+        .to_string(index=False)
+    )
+    if args.out:
+        results_df.to_csv(args.out, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark in-memory vs streaming training on synthetic disruptions.
+
+Every run happens in a fresh process so the reported peak RSS belongs to
+that run only.
+
+    python benchmarks/streaming_training.py --base-rows 50000 --scales 1 10 100
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ml_streaming import (  # noqa: E402
+    FEATURES,
+    TARGET,
+    iter_training_batches,
+    train_streaming,
+)
+from utils import disruption_minutes  # noqa: E402
+
+START = pd.Timestamp("2011-01-01")
+DAYS = 11 * 365
+CHUNKSIZE = 100_000
+
+
+def synthetic_chunks(n_rows, chunksize=CHUNKSIZE, seed=42):
+    """Disruptions spread over `DAYS` days, ordered by start time."""
+    rng = np.random.default_rng(seed)
+    step = DAYS * 86400 / n_rows
+    for offset in range(0, n_rows, chunksize):
+        n = min(chunksize, n_rows - offset)
+        seconds = (np.arange(offset, offset + n) * step).astype("int64")
+        start = START + pd.to_timedelta(seconds, unit="s")
+        duration = rng.gamma(1.5, 40, n).astype("float32")
+        yield pd.DataFrame(
+            {
+                "start_time": start,
+                "end_time": start + pd.to_timedelta(duration, unit="min"),
+                TARGET: duration,
+            }
+        )
+
+
+def synthetic_weather(start_date, end_date):
+    dates = pd.date_range(start_date, end_date, freq="D")
+    day = dates.dayofyear.to_numpy()
+    mean = 10 + 8 * np.sin(2 * np.pi * day / 365)
+    return pd.DataFrame(
+        {
+            "temperature_2m_mean": mean,
+            "temperature_2m_min": mean - 5,
+            "temperature_2m_max": mean + 5,
+            "rain_sum": (day * 7919 % 13).astype(float),
+        },
+        index=dates.date,
+    )
+
+
+def _run(mode, n_rows):
+    params = {"nthread": 1}
+    start = time.perf_counter()
+    if mode == "in-memory":
+        import xgboost as xgb
+
+        df = pd.concat(synthetic_chunks(n_rows), ignore_index=True)
+        daily = disruption_minutes(df).to_frame()
+        daily.index = daily.index.date
+        df = daily.join(synthetic_weather(daily.index.min(), daily.index.max()))
+        xgb.train(
+            {"tree_method": "hist", "max_depth": 5, "eta": 0.1, **params},
+            xgb.DMatrix(df[FEATURES], label=df[TARGET]),
+            num_boost_round=100,
+        )
+    else:
+        train_streaming(
+            lambda: iter_training_batches(
+                synthetic_chunks(n_rows), synthetic_weather, batch_days=1024
+            ),
+            params=params,
+        )
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KiB on linux
+    return seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-rows", type=int, default=50_000)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--out", help="optional csv file for the results")
+    args = parser.parse_args()
+
+    results = []
+    ctx = get_context("spawn")
+    for scale in args.scales:
+        n_rows = args.base_rows * scale
+        for mode in ["in-memory", "streaming"]:
+            with ctx.Pool(1) as pool:
+                seconds, peak_mb = pool.apply(_run, (mode, n_rows))
+            results.append(
+                {
+                    "scale": scale,
+                    "rows": n_rows,
+                    "mode": mode,
+                    "seconds": round(seconds, 2),
+                    "peak_rss_mb": round(peak_mb, 1),
+                }
+            )
+            print(results[-1], flush=True)
+
+    results_df = pd.DataFrame(results)
+    print(results_df.to_string(index=False))
+    if args.out:
+        results_df.to_csv(args.out, index=False)
+
+
+if __name__ == "__main__":
+    main()
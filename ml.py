@@ -8,7 +8,7 @@ from sklearn.model_selection import RepeatedStratifiedKFold, GridSearchCV
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import cross_validate
 import xgboost as xgb
-from utils import get_historical_weather
+from utils import disruption_minutes, get_historical_weather
 
 
 # %%
@@ -19,18 +19,12 @@ _ = load_dotenv(find_dotenv())
 train_engine = create_engine(os.environ.get("MYSQL_CONNECT_URL") + "train_data")
 
 # %%
-train_df = (
+# the minutes of a disruption are spread over the days it spans, use
+# freq="h" for hourly targets
+train_df = disruption_minutes(
     pd.read_sql_query("SELECT * FROM raw_data;", train_engine)
-    .assign(
-        **{
-            "start_time": lambda x: pd.to_datetime(x["start_time"]),
-            "end_time": lambda x: pd.to_datetime(x["end_time"]),
-            "date": lambda x: pd.to_datetime(x["start_time"]).dt.date,
-        }
-    )
-    .groupby("date")
-    .agg({"duration_minutes": "sum"})
-)
+).to_frame()
+train_df.index = pd.Index(train_df.index.date, name="date")
 # %%
 weather_df = (
     get_historical_weather(
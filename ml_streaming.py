@@ -0,0 +1,278 @@
+# %%
+"""Out-of-core counterpart of ml.py.
+
+Disruptions are streamed from SQL (or parquet) in chunks, reduced to daily
+targets incrementally, joined with the daily weather features batch by
+batch and fed to XGBoost through a `DataIter`, so peak memory depends on the
+chunk size and not on the amount of history.
+"""
+import os
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, Optional
+
+import pandas as pd
+import xgboost as xgb
+from dotenv import load_dotenv, find_dotenv
+from utils import aggregate_daily_weather, disruption_minutes, get_historical_weather
+
+FEATURES = [
+    "temperature_2m_mean",
+    "temperature_2m_min",
+    "temperature_2m_max",
+    "rain_sum",
+]
+TARGET = "duration_minutes"
+OUTLIER_MINUTES = 20000
+
+
+def read_sql_chunks(
+    engine, chunksize: int = 100_000, table: str = "raw_data"
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream disruptions from SQL ordered by start time.
+
+    A server side cursor is used so the driver does not buffer the whole
+    result set before the first chunk is returned.
+
+    Parameters
+    ----------
+    engine: sqlalchemy.engine.Engine
+        Engine connected to the train_data database.
+    chunksize: int
+        Number of rows per chunk.
+    table: str
+        Table containing the raw disruptions.
+
+    Returns
+    -------
+    chunks: Iterator[pd.DataFrame]
+        Chunks with the columns "start_time", "end_time" and
+        "duration_minutes".
+
+    """
+    query = (
+        f"SELECT start_time, end_time, duration_minutes FROM {table} "
+        "ORDER BY start_time;"
+    )
+    with engine.connect().execution_options(stream_results=True) as conn:
+        for chunk in pd.read_sql_query(
+            query, conn, chunksize=chunksize, parse_dates=["start_time", "end_time"]
+        ):
+            yield chunk
+
+
+def read_parquet_chunks(path: str, batch_size: int = 100_000) -> Iterator[pd.DataFrame]:
+    """
+    Stream disruptions from a parquet file sorted by start time.
+
+    Parameters
+    ----------
+    path: str
+        Path of the parquet file.
+    batch_size: int
+        Number of rows per chunk.
+
+    Returns
+    -------
+    chunks: Iterator[pd.DataFrame]
+        Chunks with the columns "start_time", "end_time" and
+        "duration_minutes".
+
+    """
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(
+        batch_size=batch_size, columns=["start_time", "end_time", TARGET]
+    ):
+        yield batch.to_pandas()
+
+
+def iter_daily_targets(
+    chunks: Iterable[pd.DataFrame], freq: str = "D"
+) -> Iterator[pd.Series]:
+    """
+    Reduce ordered disruption chunks to disruption minutes per day.
+
+    The minutes of a disruption are spread over all days it spans (see
+    `disruption_minutes`). Later chunks only start at or after the last
+    start of the current chunk, so the days before it are final and
+    emitted, the rest is carried over.
+
+    Parameters
+    ----------
+    chunks: Iterable[pd.DataFrame]
+        Disruption chunks ordered by "start_time".
+    freq: str
+        Bucket width, "h" gives hourly targets.
+
+    Returns
+    -------
+    daily: Iterator[pd.Series]
+        Disruption minutes indexed by date, each date emitted exactly once.
+
+    """
+    carry = None
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        minutes = disruption_minutes(chunk, freq=freq)
+        carry = minutes if carry is None else carry.add(minutes, fill_value=0)
+        final = carry.index < pd.Timestamp(chunk["start_time"].max()).floor(freq)
+        if final.any():
+            yield carry[final]
+        carry = carry[~final]
+    if carry is not None and not carry.empty:
+        yield carry
+
+
+def iter_training_batches(
+    chunks: Iterable[pd.DataFrame],
+    weather_fn: Callable[[str, str], pd.DataFrame],
+    batch_days: int = 4096,
+) -> Iterator[pd.DataFrame]:
+    """
+    Build feature batches from disruption chunks.
+
+    Parameters
+    ----------
+    chunks: Iterable[pd.DataFrame]
+        Disruption chunks ordered by "start_time".
+    weather_fn: Callable
+        Called with a start and end date (YYYY-MM-DD), returns the daily
+        weather features indexed by date, see `aggregate_daily_weather`.
+    batch_days: int
+        Maximum number of days (rows) per batch.
+
+    Returns
+    -------
+    batches: Iterator[pd.DataFrame]
+        Frames with the `FEATURES` columns and the target.
+
+    """
+    pending = []
+    n_pending = 0
+
+    def build(parts):
+        daily = pd.concat(parts).rename(TARGET).to_frame()
+        daily.index = daily.index.date
+        weather_df = weather_fn(str(daily.index.min()), str(daily.index.max()))
+        return (
+            daily.join(weather_df, how="left")
+            .loc[lambda x: x[TARGET] < OUTLIER_MINUTES]  # remove outliers
+            .dropna()
+        )
+
+    for daily in iter_daily_targets(chunks):
+        pending.append(daily)
+        n_pending += len(daily)
+        if n_pending >= batch_days:
+            yield build(pending)
+            pending, n_pending = [], 0
+    if pending:
+        yield build(pending)
+
+
+class DisruptionIter(xgb.DataIter):
+    """XGBoost data iterator over freshly created feature batches.
+
+    Parameters
+    ----------
+    make_batches: Callable
+        Returns a new iterator of feature batches, called on every pass
+        over the data.
+    cache_prefix: str, optional
+        Location of the on-disk cache, only used for external memory
+        `DMatrix` construction.
+
+    """
+
+    def __init__(
+        self,
+        make_batches: Callable[[], Iterator[pd.DataFrame]],
+        cache_prefix: Optional[str] = None,
+    ):
+        self._make_batches = make_batches
+        self._batches = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data: Callable) -> bool:
+        if self._batches is None:
+            self._batches = self._make_batches()
+        batch = next(self._batches, None)
+        if batch is None:
+            return False
+        input_data(data=batch[FEATURES], label=batch[TARGET])
+        return True
+
+    def reset(self) -> None:
+        self._batches = None
+
+
+def train_streaming(
+    make_batches: Callable[[], Iterator[pd.DataFrame]],
+    params: Optional[dict] = None,
+    num_boost_round: int = 100,
+    external_memory: bool = False,
+    cache_prefix: str = os.path.join(".xgb_cache", "disruptions"),
+) -> xgb.Booster:
+    """
+    Train an XGBoost regressor without materialising the training set.
+
+    Parameters
+    ----------
+    make_batches: Callable
+        Returns a new iterator of feature batches, see
+        `iter_training_batches`.
+    params: dict, optional
+        XGBoost booster parameters.
+    num_boost_round: int
+        Number of boosting rounds.
+    external_memory: bool
+        Page the data to `cache_prefix` on disk instead of keeping the
+        quantised matrix in memory.
+    cache_prefix: str
+        On-disk cache location used with `external_memory`.
+
+    Returns
+    -------
+    booster: xgb.Booster
+        The trained model.
+
+    """
+    params = {"tree_method": "hist", "max_depth": 5, "eta": 0.1, **(params or {})}
+    if external_memory:
+        os.makedirs(os.path.dirname(cache_prefix) or ".", exist_ok=True)
+        dtrain = xgb.DMatrix(DisruptionIter(make_batches, cache_prefix=cache_prefix))
+    else:
+        dtrain = xgb.QuantileDMatrix(DisruptionIter(make_batches))
+    return xgb.train(params, dtrain, num_boost_round=num_boost_round)
+
+
+@lru_cache(maxsize=None)
+def historical_weather_features(start_date: str, end_date: str) -> pd.DataFrame:
+    """Daily weather features for the training location, cached per range."""
+    return aggregate_daily_weather(
+        get_historical_weather(
+            lat=52.520008,
+            lon=13.404954,
+            start_date=start_date,
+            end_date=end_date,
+        )
+    )
+
+
+# %%
+if __name__ == "__main__":
+    from sqlalchemy import create_engine
+
+    _ = load_dotenv(find_dotenv())
+    # mysql+pymysql://<user>:<password>@<host>[:<port>]/<dbname>
+    train_engine = create_engine(os.environ.get("MYSQL_CONNECT_URL") + "train_data")
+
+    booster = train_streaming(
+        lambda: iter_training_batches(
+            read_sql_chunks(train_engine), historical_weather_features
+        )
+    )
+    booster.save_model("model_api/xgb.model")
@@ -0,0 +1,311 @@
+"""Admission control for the inference endpoints.
+
+Predictions run on a dedicated executor with a fixed number of workers. At
+most `queue_depth` requests wait for a worker, every request has a deadline.
+Requests beyond that are rejected right away (429 when the queue is full,
+503 when the deadline can not be met) with a `Retry-After` estimate, so
+latency of the accepted requests stays bounded under overload instead of
+every request slowing down until clients time out.
+
+Requests are admitted by `AdmissionMiddleware`, before routing and before
+their body is read and validated, so the deadline starts when the request
+reaches the application and a rejection costs next to nothing. Time spent
+before that, waiting for the server, is bounded by running uvicorn with
+`--limit-concurrency`.
+"""
+import asyncio
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import math
+import os
+import threading
+import time
+from typing import Callable, Iterable, NamedTuple, Optional
+
+INFERENCE_CONCURRENCY = int(
+    os.environ.get("INFERENCE_CONCURRENCY", os.cpu_count() or 1)
+)
+INFERENCE_QUEUE_DEPTH = int(os.environ.get("INFERENCE_QUEUE_DEPTH", 32))
+INFERENCE_DEADLINE_MS = float(os.environ.get("INFERENCE_DEADLINE_MS", 1000))
+
+
+class Rejected(Exception):
+    """The request was not (completely) served, answer with `status_code`."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Expired(Exception):
+    pass
+
+
+class Ticket(NamedTuple):
+    """An admitted request, see `AdmissionController.admit`."""
+
+    arrived: float
+    deadline: float
+
+
+class AdmissionController:
+    """Bounded executor for predictions.
+
+    Parameters
+    ----------
+    concurrency: int
+        Number of predictions running at the same time.
+    queue_depth: int
+        Number of requests waiting for a worker before new ones are
+        rejected with 429.
+    deadline_ms: float
+        Longest time a request may take, queueing included. Requests that
+        can not finish in time are answered with 503.
+
+    Examples
+    --------
+    >>> admission = AdmissionController(concurrency=2, queue_depth=8)
+    >>> ticket = admission.admit()
+    >>> try:
+    ...     prediction = await admission.run(model.predict, dmatrix, ticket=ticket)
+    ... finally:
+    ...     admission.release()
+
+    """
+
+    def __init__(
+        self,
+        concurrency: int = INFERENCE_CONCURRENCY,
+        queue_depth: int = INFERENCE_QUEUE_DEPTH,
+        deadline_ms: float = INFERENCE_DEADLINE_MS,
+    ):
+        self.concurrency = concurrency
+        self.queue_depth = queue_depth
+        self.deadline_s = deadline_ms / 1000
+        self.counters = Counter()
+        # admitted and not answered: being read, queued or running
+        self.in_flight = 0
+        self.running = 0
+        # running means of the time spent queueing and predicting
+        self.wait_s = 0.0
+        self.service_s = 0.001
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="inference"
+        )
+
+    @property
+    def waiting(self) -> int:
+        return max(0, self.in_flight - self.running)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue is expected to have drained."""
+        drain_s = (self.waiting / self.concurrency + 1) * self.service_s
+        return max(1, math.ceil(drain_s))
+
+    def _reject(self, status_code: int, reason: str, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+        raise Rejected(status_code, reason, self.retry_after())
+
+    def admit(self, deadline_ms: Optional[float] = None) -> Ticket:
+        """
+        Admit a request or reject it right away, call `release` when done.
+
+        Parameters
+        ----------
+        deadline_ms: float, optional
+            Deadline of this request, can only shorten the default.
+
+        Returns
+        -------
+        ticket: Ticket
+            Arrival time and deadline, pass it to `run`.
+
+        Raises
+        ------
+        Rejected
+            429 when the queue is full, 503 when the queue is expected to
+            take longer than the deadline.
+
+        """
+        arrived = time.monotonic()
+        deadline_s = self.deadline_s
+        if deadline_ms is not None:
+            deadline_s = min(deadline_s, deadline_ms / 1000)
+
+        with self._lock:
+            full = self.in_flight >= self.concurrency + self.queue_depth
+            # queued work ahead of this request plus its own prediction
+            expected_s = (self.waiting / self.concurrency + 1) * self.service_s
+            late = expected_s > deadline_s
+            if not (full or late):
+                self.in_flight += 1
+                self.counters["accepted"] += 1
+        if full:
+            self._reject(429, "inference queue full", "rejected_queue_full")
+        if late:
+            self._reject(503, "inference deadline exceeded", "deadline_exceeded")
+        return Ticket(arrived=arrived, deadline=arrived + deadline_s)
+
+    def release(self):
+        """The admitted request was answered."""
+        with self._lock:
+            self.in_flight -= 1
+
+    async def run(self, fn: Callable, *args, ticket: Ticket):
+        """
+        Run `fn(*args)` on the inference executor.
+
+        Parameters
+        ----------
+        fn: Callable
+            The prediction, called on a worker thread.
+        ticket: Ticket
+            Returned by `admit` when the request arrived.
+
+        Returns
+        -------
+        result
+            What `fn` returned.
+
+        Raises
+        ------
+        Rejected
+            When the deadline passed before the prediction finished.
+
+        """
+
+        def job():
+            started = time.monotonic()
+            with self._lock:
+                self.wait_s = 0.9 * self.wait_s + 0.1 * (started - ticket.arrived)
+                # the caller already got a 503, do not spend a worker on it
+                if started >= ticket.deadline:
+                    self.counters["expired_in_queue"] += 1
+                    raise _Expired()
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.counters["completed"] += 1
+                    self.service_s = 0.9 * self.service_s + 0.1 * (
+                        time.monotonic() - started
+                    )
+
+        future = asyncio.get_running_loop().run_in_executor(self._executor, job)
+        # nobody awaits the job anymore once the caller timed out
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            # shielded: a timed out job stays queued and skips itself
+            return await asyncio.wait_for(
+                asyncio.shield(future), timeout=ticket.deadline - time.monotonic()
+            )
+        except (asyncio.TimeoutError, _Expired):
+            self._reject(503, "inference deadline exceeded", "deadline_exceeded")
+
+    def metrics(self) -> str:
+        """Queue state and counters in the prometheus text format."""
+        with self._lock:
+            gauges = {
+                "inference_concurrency": self.concurrency,
+                "inference_queue_depth_limit": self.queue_depth,
+                "inference_queue_waiting": self.waiting,
+                "inference_running": self.running,
+                "inference_queue_wait_seconds_mean": round(self.wait_s, 6),
+                "inference_service_seconds_mean": round(self.service_s, 6),
+            }
+            counters = dict(self.counters)
+        lines = []
+        for name, value in gauges.items():
+            lines += [f"# TYPE model_api_{name} gauge", f"model_api_{name} {value}"]
+        lines.append("# TYPE model_api_inference_requests_total counter")
+        for outcome in [
+            "accepted",
+            "completed",
+            "rejected_queue_full",
+            "deadline_exceeded",
+            "expired_in_queue",
+        ]:
+            lines.append(
+                f'model_api_inference_requests_total{{outcome="{outcome}"}} '
+                f"{counters.get(outcome, 0)}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware admitting requests to `paths` as soon as they arrive.
+
+    The admission is decided on the request line and headers, before
+    routing, body parsing and validation, so rejections are cheap and the
+    deadline covers everything the application does. The ticket is passed
+    to the endpoint as `request.state.admission`, the time the application
+    took is returned in a `Server-Timing: app;dur=<ms>` header.
+
+    Parameters
+    ----------
+    app:
+        The wrapped ASGI application.
+    controller: AdmissionController
+        Admits the requests and runs their predictions.
+    paths: Iterable[str]
+        Paths of the inference endpoints, other requests pass through.
+
+    """
+
+    def __init__(self, app, controller: AdmissionController, paths: Iterable[str]):
+        self.app = app
+        self.controller = controller
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        try:
+            deadline_ms = float(dict(scope["headers"])[b"x-deadline-ms"])
+        except (KeyError, ValueError):
+            deadline_ms = None
+        try:
+            ticket = self.controller.admit(deadline_ms)
+        except Rejected as exc:
+            await self._send_rejection(send, exc)
+            return
+        scope.setdefault("state", {})["admission"] = ticket
+
+        async def send_with_timing(message):
+            # time since admission, what the deadline is measured against
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.monotonic() - ticket.arrived) * 1000
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", f"app;dur={elapsed_ms:.1f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            self.controller.release()
+
+    @staticmethod
+    async def _send_rejection(send, exc: Rejected):
+        body = json.dumps({"detail": exc.reason}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": exc.status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(exc.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,111 @@
+"""Forecast client of the model api.
+
+All requests share one pooled http client and one forecast cache, so
+concurrent callers for the same location trigger a single upstream request
+and later callers are served from memory until the forecast expires.
+"""
+from collections import OrderedDict
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+import httpx
+import pandas as pd
+
+OPEN_METEO_FORECAST_URL = os.environ.get(
+    "OPEN_METEO_FORECAST_URL", "https://api.open-meteo.com/v1/forecast"
+)
+# open-meteo updates its forecast hourly
+FORECAST_TTL_S = float(os.environ.get("FORECAST_TTL_S", 900))
+FEATURE_LIST = ["temperature_2m", "rain"]
+# locations are rounded to ~1km, like the keys of the prediction store
+PRECISION = 2
+
+client = httpx.Client(
+    timeout=httpx.Timeout(10.0, connect=3.05),
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+)
+
+
+def daily_features(hourly: pd.DataFrame) -> pd.DataFrame:
+    """Daily model features of an hourly forecast, see `utils.aggregate_daily_weather`."""
+    daily = (
+        hourly.assign(**{"date": lambda x: pd.to_datetime(x["time"]).dt.date})
+        .groupby("date")
+        .agg({"temperature_2m": ["mean", "min", "max"], "rain": "sum"})
+    )
+    daily.columns = ["_".join(col) for col in daily.columns]
+    return daily
+
+
+def fetch_forecast(lat: float, lon: float) -> pd.DataFrame:
+    response = client.get(
+        OPEN_METEO_FORECAST_URL,
+        params={"latitude": lat, "longitude": lon, "hourly": ",".join(FEATURE_LIST)},
+    )
+    response.raise_for_status()
+    return pd.DataFrame(response.json()["hourly"])
+
+
+class ForecastCache:
+    """TTL and LRU bounded cache of hourly forecasts and their daily features.
+
+    Parameters
+    ----------
+    ttl_s: float
+        Seconds a forecast is served from the cache.
+    max_entries: int
+        Number of locations kept, the least recently used is dropped first.
+
+    """
+
+    def __init__(self, ttl_s: float = FORECAST_TTL_S, max_entries: int = 1024):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_s:
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def get(self, lat: float, lon: float) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Hourly forecast and daily features of a location."""
+        key = (round(lat, PRECISION), round(lon, PRECISION))
+        value = self._lookup(key)
+        if value is not None:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                # another caller may have fetched it while we waited
+                value = self._lookup(key)
+                if value is not None:
+                    return value
+                hourly = fetch_forecast(*key)
+                value = (hourly, daily_features(hourly))
+                with self._lock:
+                    self.stats["misses"] += 1
+                    self._entries[key] = (time.monotonic(), value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            finally:
+                # also after a failed fetch, or the lock of every key leaks;
+                # a newer lock of the same key belongs to other callers
+                with self._lock:
+                    if self._key_locks.get(key) is key_lock:
+                        del self._key_locks[key]
+        return value
+
+
+forecasts = ForecastCache()
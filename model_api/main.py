@@ -1,26 +1,108 @@
+from contextlib import asynccontextmanager
+import logging
+import os
+import time
 from typing import Union
 
-from fastapi import FastAPI
+import httpx
+from admission import AdmissionController, AdmissionMiddleware, Rejected
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from forecast import forecasts
 from models import ExpectedInputPrepped
+from starlette.concurrency import run_in_threadpool
 
-import pandas as pd
+import numpy as np
 import xgboost as xgb
 
+logger = logging.getLogger("uvicorn.error")
+
+# seconds from process start until the first prediction may be served
+COLD_START_BUDGET_S = float(os.environ.get("COLD_START_BUDGET_S", 10))
+WARMUP_REQUESTS = int(os.environ.get("WARMUP_REQUESTS", 5))
+
+
+def process_started_at():
+    """Wall clock time the process was started, falls back to import time."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+status = {
+    "process_started_at": process_started_at(),
+    "ready": False,
+    "ready_after_s": None,
+    "first_prediction_after_s": None,
+}
+
+admission = AdmissionController()
+
 model = xgb.Booster()
 model.load_model("xgb.model")
+# the inference workers share the cores instead of each using all of them
+model.set_param({"nthread": max(1, (os.cpu_count() or 1) // admission.concurrency)})
 
 
 def prepped_data_predict(input_dict):
-    df = pd.DataFrame(
-        input_dict,
-        index=[0],
-    )
-    prediction = model.predict(xgb.DMatrix(df))
+    # a single row as a plain array, a DataFrame costs more than the prediction
+    row = np.array([list(input_dict.values())], dtype=np.float32)
+    prediction = model.predict(xgb.DMatrix(row))
     return str(prediction[0])
 
 
-app = FastAPI()
+def daily_predict(daily):
+    return model.predict(xgb.DMatrix(daily))
+
+
+def json_columns(df):
+    """Columns as lists with NaN as None, gaps in the forecast are valid json."""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="list")
+
+
+async def warmup(app):
+    """Send synthetic predictions through the full request path.
+
+    Routing, pydantic validation, the pandas/xgboost prediction and response
+    serialisation all initialise lazily, so the first real request would
+    otherwise pay for it.
+    """
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://warmup"
+    ) as client:
+        for _ in range(WARMUP_REQUESTS):
+            response = await client.post(
+                "/predict_prepped_data",
+                json=ExpectedInputPrepped().dict(),
+                headers={"X-Warmup": "1"},
+            )
+            response.raise_for_status()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warmup(app)
+    status["ready"] = True
+    status["ready_after_s"] = round(time.time() - status["process_started_at"], 3)
+    logger.info("model api ready after %ss", status["ready_after_s"])
+    if status["ready_after_s"] > COLD_START_BUDGET_S:
+        logger.warning(
+            "cold start of %ss exceeds the budget of %ss",
+            status["ready_after_s"],
+            COLD_START_BUDGET_S,
+        )
+    yield
+    # stop receiving traffic while shutting down
+    status["ready"] = False
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://192.168.1.72:3000/",
@@ -36,6 +118,22 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# outermost: admission is decided before cors, routing and body parsing;
+# /predict_location admits itself once its forecast is fetched
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    paths=["/predict_prepped_data"],
+)
+
+
+@app.exception_handler(Rejected)
+def rejected_handler(request: Request, exc: Rejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 @app.get("/", tags=["Root"])
@@ -43,6 +141,67 @@ def read_root():
     return {"Welcome": "This is the API for the xgboost model"}
 
 
+@app.get("/healthz", tags=["Health"])
+def healthz():
+    """Liveness: the process is up and serving http."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz", tags=["Health"])
+def readyz(response: Response):
+    """Readiness: warmup finished, the pod may receive traffic."""
+    if not status["ready"]:
+        response.status_code = 503
+    return {**status, "cold_start_budget_s": COLD_START_BUDGET_S}
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+def metrics():
+    """Inference queue and forecast cache metrics in the prometheus format."""
+    lines = admission.metrics().splitlines()
+    lines.append("# TYPE model_api_forecast_cache_total counter")
+    for outcome, value in forecasts.stats.items():
+        lines.append(f'model_api_forecast_cache_total{{outcome="{outcome}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
 @app.post("/predict_prepped_data", tags=["Predict One Instance"])
-def predict_prepped(body: ExpectedInputPrepped):
-    return {"prediction": prepped_data_predict(body.dict())}
+async def predict_prepped(body: ExpectedInputPrepped, request: Request):
+    prediction = await admission.run(
+        prepped_data_predict, body.dict(), ticket=request.state.admission
+    )
+    if status["first_prediction_after_s"] is None and "X-Warmup" not in request.headers:
+        status["first_prediction_after_s"] = round(
+            time.time() - status["process_started_at"], 3
+        )
+    return {"prediction": prediction}
+
+
+@app.get("/predict_location", tags=["Predict Location"])
+async def predict_location(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    x_deadline_ms: Union[float, None] = Header(default=None),
+):
+    """Forecast, daily features and predictions of all forecast days at once."""
+    try:
+        # upstream io, stays off the inference workers
+        hourly, daily = await run_in_threadpool(forecasts.get, lat, lon)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"forecast unavailable: {e}")
+    # admitted only now: the fetch neither counts against the inference
+    # deadline nor holds a queue slot
+    ticket = admission.admit(x_deadline_ms)
+    try:
+        predictions = await admission.run(daily_predict, daily, ticket=ticket)
+    finally:
+        admission.release()
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "hourly": json_columns(hourly),
+        "daily": {
+            "date": [str(d) for d in daily.index],
+            **json_columns(daily.assign(prediction=predictions)),
+        },
+    }
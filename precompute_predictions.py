@@ -0,0 +1,147 @@
+"""Precompute the 7 day disruption predictions for a fixed set of locations.
+
+The forecast of all locations is fetched in one batched open-meteo request,
+scored in one call to the model and written to the prediction store that
+app.py reads. The model file is read again on every run, so a retrained
+model (e.g. after redeploying model_api) is picked up without restarting
+the job. The store is only rebuilt when the forecast or the model changed.
+
+    python precompute_predictions.py            # refresh every hour
+    python precompute_predictions.py --once     # single refresh, e.g. cron
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from utils import (
+    PREDICTION_STORE_PATH,
+    get_multi_location_weather,
+    location_key,
+)
+
+# name -> (lat, lon), the first one is the dashboard default
+PREDICTION_LOCATIONS = {
+    "Amsterdam Bijlmer": (52.3116485, 4.9451244),
+    "Amsterdam": (52.377956, 4.897070),
+    "Rotterdam": (51.924420, 4.477733),
+    "Den Haag": (52.070498, 4.300700),
+    "Utrecht": (52.090737, 5.121420),
+    "Eindhoven": (51.441642, 5.469722),
+    "Groningen": (53.219383, 6.566502),
+    "Zwolle": (52.516775, 6.083022),
+    "Arnhem": (51.985103, 5.898730),
+    "Maastricht": (50.851368, 5.690972),
+}
+FEATURE_LIST = ["temperature_2m", "rain"]
+PRECISION = 2
+
+
+def build_store(weather, names, booster):
+    """Score every location and the country average in one predict call."""
+    # weather.values: (locations, days, features), "NL" is the mean location
+    nl_values = np.nanmean(weather.values, axis=0, keepdims=True)
+    nl_hourly = np.nanmean(weather.hourly, axis=0, keepdims=True)
+    values = np.concatenate([weather.values, nl_values])
+    hourly = np.concatenate([weather.hourly, nl_hourly])
+
+    n_locations, n_days, n_features = values.shape
+    predictions = booster.predict(
+        xgb.DMatrix(
+            pd.DataFrame(values.reshape(-1, n_features), columns=weather.features)
+        )
+    ).reshape(n_locations, n_days)
+
+    keys = [location_key(lat, lon, PRECISION) for lat, lon in weather.coords]
+    keys.append("NL")
+    labels = [
+        ", ".join(names[i] for i in np.flatnonzero(weather.index == row))
+        for row in range(len(weather.coords))
+    ] + ["Netherlands"]
+    return {
+        "generated_at": pd.Timestamp.now(tz="UTC").isoformat(),
+        "precision": PRECISION,
+        "times": pd.DatetimeIndex(weather.times).strftime("%Y-%m-%dT%H:%M").tolist(),
+        "hourly_features": FEATURE_LIST,
+        "dates": [str(d) for d in weather.dates],
+        "features": weather.features,
+        "locations": {
+            key: {
+                "name": label,
+                "hourly": np.round(hourly[i], 2).tolist(),
+                "features": np.round(values[i], 3).tolist(),
+                "predictions": np.round(predictions[i].astype(float), 2).tolist(),
+            }
+            for i, (key, label) in enumerate(zip(keys, labels))
+        },
+    }
+
+
+def write_store(store, path=PREDICTION_STORE_PATH):
+    """Write atomically so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(store, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def refresh(locations, model_path, path=PREDICTION_STORE_PATH, last_digest=None):
+    """Fetch the forecast and rewrite the store if the forecast or model changed."""
+    with open(model_path, "rb") as f:
+        model = f.read()
+    weather = get_multi_location_weather(
+        list(locations.values()),
+        feature_list=FEATURE_LIST,
+        precision=PRECISION,
+        refresh=True,
+    )
+    digest = hashlib.sha1(weather.hourly.tobytes() + model).hexdigest()
+    if digest == last_digest and os.path.exists(path):
+        # same forecast run and model, only mark the store as fresh
+        with open(path) as f:
+            store = json.load(f)
+        store["generated_at"] = pd.Timestamp.now(tz="UTC").isoformat()
+    else:
+        booster = xgb.Booster()
+        booster.load_model(bytearray(model))
+        store = build_store(weather, list(locations), booster)
+    write_store(store, path)
+    return digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--once", action="store_true")
+    parser.add_argument("--interval", type=int, default=3600, help="seconds")
+    parser.add_argument("--locations", help="json file with {name: [lat, lon]}")
+    parser.add_argument("--model", default="model_api/xgb.model")
+    parser.add_argument("--store", default=PREDICTION_STORE_PATH)
+    args = parser.parse_args()
+
+    locations = PREDICTION_LOCATIONS
+    if args.locations:
+        with open(args.locations) as f:
+            locations = json.load(f)
+
+    digest = None
+    while True:
+        try:
+            digest = refresh(locations, args.model, args.store, digest)
+            print(f"prediction store refreshed: {args.store}", flush=True)
+        except Exception as e:
+            # keep the previous store, app.py falls back to the live path once
+            # it is outdated
+            print(f"prediction store refresh failed: {e}", flush=True)
+            if args.once:
+                raise
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ import os
 from sqlalchemy import create_engine
 import pandas as pd
 from dotenv import load_dotenv, find_dotenv
-from glob import glob
+from utils import load_disruptions
 
 _ = load_dotenv(find_dotenv())
 
@@ -27,7 +27,7 @@ except:
 train_engine = create_engine(os.environ.get("MYSQL_CONNECT_URL") + "train_data")
 
 # %%
-df = pd.concat([pd.read_csv(f) for f in glob("data/*.csv")], axis=0, ignore_index=True)
+df = load_disruptions("data/*.csv")
 # %%
 try:
     df.to_sql("raw_data", train_engine, if_exists="fail", index=False)
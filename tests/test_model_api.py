@@ -0,0 +1,48 @@
+import importlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+MODEL_API = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model_api")
+
+
+@pytest.fixture
+def model_api(monkeypatch):
+    # main.py loads xgb.model and imports its siblings relative to model_api/
+    monkeypatch.chdir(MODEL_API)
+    monkeypatch.syspath_prepend(MODEL_API)
+    monkeypatch.setenv("INFERENCE_DEADLINE_MS", "250")
+    for name in ["admission", "forecast", "main"]:
+        sys.modules.pop(name, None)
+    return importlib.import_module("main")
+
+
+def test_slow_forecast_fetch_does_not_count_against_the_inference_deadline(
+    model_api, monkeypatch
+):
+    forecast = sys.modules["forecast"]
+
+    def slow_fetch(lat, lon):
+        time.sleep(0.5)  # twice the inference deadline
+        times = pd.date_range("2024-01-01", periods=48, freq="h")
+        return pd.DataFrame(
+            {
+                "time": times.strftime("%Y-%m-%dT%H:%M"),
+                "temperature_2m": np.linspace(5, 15, 48),
+                "rain": np.zeros(48),
+            }
+        )
+
+    monkeypatch.setattr(forecast, "fetch_forecast", slow_fetch)
+    with TestClient(model_api.app) as client:
+        response = client.get("/predict_location", params={"lat": 52.0, "lon": 4.9})
+
+    assert response.status_code == 200
+    assert len(response.json()["daily"]["prediction"]) == 2
+    assert model_api.admission.in_flight == 0
+    assert model_api.admission.counters["expired_in_queue"] == 0
@@ -1,23 +1,16 @@
 # %%
-import pandas as pd
 from glob import glob
 import seaborn as sns
+from utils import disruption_minutes, load_disruptions
 
 # %%
 glob("data/*.csv")
 
 # %%
-df = pd.concat(
-    [pd.read_csv(f) for f in glob("data/*.csv")], axis=0, ignore_index=True
-).assign(
-    **{
-        "start_time": lambda x: pd.to_datetime(x["start_time"]),
-        "end_time": lambda x: pd.to_datetime(x["end_time"]),
-        "date": lambda x: pd.to_datetime(x["start_time"]).dt.date,
-    }
-)
+df = load_disruptions("data/*.csv")
 # %%
-prepped_df = df.groupby("date").agg({"duration_minutes": "sum"})
+# minutes per day a disruption spans, not per start date
+prepped_df = disruption_minutes(df).rename_axis("date").to_frame()
 # %%
 _ = sns.lineplot(data=prepped_df, x="date", y="duration_minutes")
 # %%
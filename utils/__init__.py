@@ -0,0 +1,76 @@
+"""Shared helpers of the dashboard, the training scripts and the EDA.
+
+The helpers live in focused submodules that are only imported when one of
+their names is first used, so e.g. `from utils import get_historical_weather`
+does not pay for streamlit or scikit-learn:
+
+- `utils.clients`: open-meteo, NS and model api clients
+- `utils.concurrency`: request coalescing and rate limiting for the clients
+- `utils.datasets`: loading the disruption csv files
+- `utils.downsample`: server-side decimation of long time series for plots
+- `utils.features`: daily and per-station weather features
+- `utils.forecasting`: vectorized autoregressive weather forecasts
+- `utils.intervals`: spreading disruption minutes over days or hours
+- `utils.profiling`: stage timings and render logs of the dashboard
+- `utils.scaling`: fitting, persisting and applying scalers
+- `utils.store`: the precomputed prediction store
+- `utils.ui`: streamlit login and the color palette
+"""
+import importlib
+
+_EXPORTS = {
+    "get_current_and_forecast": "clients",
+    "get_historical_weather": "clients",
+    "get_multi_location_weather": "clients",
+    "get_station_coordinates": "clients",
+    "get_disruption_prediction": "clients",
+    "get_location_prediction": "clients",
+    "get_amount_disruptions_NS": "clients",
+    "StationWeather": "clients",
+    "DAILY_AGGREGATIONS": "clients",
+    "SingleFlight": "concurrency",
+    "TokenBucket": "concurrency",
+    "coalesce": "concurrency",
+    "DISRUPTIONS_SCHEMA": "datasets",
+    "DISRUPTIONS_DATETIME_FORMAT": "datasets",
+    "read_disruptions_csv": "datasets",
+    "load_disruptions": "datasets",
+    "MultiResolution": "downsample",
+    "lttb_indices": "downsample",
+    "minmax_indices": "downsample",
+    "aggregate_daily_weather": "features",
+    "aggregate_station_weather": "features",
+    "AutoRegressiveModel": "forecasting",
+    "fit_autoregressive": "forecasting",
+    "forecast_autoregressive": "forecasting",
+    "run_forecast": "forecasting",
+    "disruption_minutes": "intervals",
+    "interval_minutes": "intervals",
+    "RenderProfiler": "profiling",
+    "note_cache_miss": "profiling",
+    "apply_scaling": "scaling",
+    "get_scaler": "scaling",
+    "partial_fit_scaler": "scaling",
+    "save_scaler": "scaling",
+    "load_scaler": "scaling",
+    "PREDICTION_STORE_PATH": "store",
+    "location_key": "store",
+    "load_prediction_store": "store",
+    "lookup_prediction": "store",
+    "check_password": "ui",
+    "segmented_palette": "ui",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_EXPORTS])
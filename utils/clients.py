@@ -0,0 +1,487 @@
+import numpy as np
+import pandas as pd
+import requests
+from typing import Optional, Dict, List, NamedTuple
+from collections import OrderedDict
+from dotenv import load_dotenv, find_dotenv
+import logging
+import os
+import threading
+import time
+from .concurrency import TokenBucket, coalesce
+from .intervals import interval_minutes
+
+logger = logging.getLogger(__name__)
+
+# the settings below and the NS secrets can be set in .env, variables that are
+# already set in the environment win
+load_dotenv(find_dotenv())
+
+# upstream apis, can be pointed at benchmarks/replay_server.py for offline runs
+OPEN_METEO_FORECAST_URL = os.environ.get(
+    "OPEN_METEO_FORECAST_URL", "https://api.open-meteo.com/v1/forecast"
+)
+OPEN_METEO_ARCHIVE_URL = os.environ.get(
+    "OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/era5"
+)
+NS_API_URL = os.environ.get(
+    "NS_API_URL", "https://gateway.apiportal.ns.nl/reisinformatie-api"
+)
+MODEL_API_URL = os.environ.get("MODEL_API_URL", "http://localhost:8000")
+
+# shared by every thread/session of the process, open-meteo allows 600 calls/min
+OPEN_METEO_LIMITER = TokenBucket(
+    rate=float(os.environ.get("OPEN_METEO_RATE", 5)), capacity=10
+)
+NS_API_LIMITER = TokenBucket(rate=float(os.environ.get("NS_API_RATE", 2)), capacity=5)
+# (connect, read) timeout of the upstream requests, a coalesced call blocks
+# every caller of its key, a batch of 100 locations can take a while
+_REQUEST_TIMEOUT = (3.05, 60)
+
+
+def _ns_headers() -> Dict:
+    return {
+        # Request headers
+        "Cache-Control": "no-cache",
+        "Ocp-Apim-Subscription-Key": os.environ.get("NS_APP_PRIMARY"),
+    }
+
+@coalesce(limiter=OPEN_METEO_LIMITER)
+def get_current_and_forecast(
+    lat=52.377956,
+    lon=4.897070,
+    feature_list=[
+        "temperature_2m",
+        "relativehumidity_2m",
+        "windspeed_10m",
+        "precipitation_probability",
+        "rain",
+    ],
+):
+    """
+    Get current and forecast weather data from open-meteo.com
+
+    Parameters
+    ----------
+    lat: float
+        Latitude of the location you want to get the weather for.
+    lon: float
+        Longitude of the location you want to get the weather for.
+    feature_list: list
+        List of features you want to get the weather for.
+        Options: "temperature_2m", "relativehumidity_2m", "windspeed_10m",
+        "precipitation_probability", "rain"
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Data frame containing the weather data.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from utils import get_current_and_forecast
+    >>> df = get_current_and_forecast()
+    >>> df.head()
+
+    """
+    url = f"{OPEN_METEO_FORECAST_URL}?latitude={lat}&longitude={lon}&current_weather=true&hourly={','.join(feature_list)}"
+    response = requests.get(url, timeout=_REQUEST_TIMEOUT)
+    return pd.DataFrame(response.json()["hourly"])
+
+
+@coalesce(limiter=OPEN_METEO_LIMITER)
+def get_historical_weather(
+    lat=52.377956,
+    lon=4.897070,
+    start_date="2022-01-01",
+    end_date="2022-12-31",
+    feature_list=[
+        "temperature_2m",
+        "relativehumidity_2m",
+        "windspeed_10m",
+        "rain",
+    ],
+):
+    """
+    Get historical weather data from open-meteo.com
+
+    Parameters
+    ----------
+    lat: float
+        Latitude of the location you want to get the weather for.
+    lon: float
+        Longitude of the location you want to get the weather for.
+    start_date: str
+        Start date of the period you want to get the weather for.
+    end_date: str
+        End date of the period you want to get the weather for.
+    feature_list: list
+        List of features you want to get the weather for.
+        Options: "temperature_2m", "relativehumidity_2m",
+        "windspeed_10m", "rain"
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Data frame containing the weather data.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from utils import get_historical_weather
+    >>> df = get_historical_weather()
+    >>> df.head()
+
+    """
+    url = f"{OPEN_METEO_ARCHIVE_URL}?latitude={lat}&longitude={lon}&start_date={start_date}&end_date={end_date}&hourly={','.join(feature_list)}"
+    response = requests.get(url, timeout=_REQUEST_TIMEOUT)
+    return pd.DataFrame(response.json()["hourly"])
+
+
+class StationWeather(NamedTuple):
+    """Daily weather for many locations as one dense array.
+
+    Attributes
+    ----------
+    coords: np.ndarray
+        Unique (lat, lon) pairs, shape (stations, 2).
+    dates: np.ndarray
+        Dates of the second axis.
+    features: List[str]
+        Names of the last axis, e.g. "temperature_2m_mean".
+    values: np.ndarray
+        Array of shape (stations, days, features).
+    index: np.ndarray
+        Row in `coords`/`values` for every requested coordinate.
+    times: np.ndarray
+        Timestamps of the hourly data.
+    hourly: np.ndarray
+        Hourly data the daily values are based on, shape
+        (stations, hours, len(feature_list)).
+    """
+
+    coords: np.ndarray
+    dates: np.ndarray
+    features: List[str]
+    values: np.ndarray
+    index: np.ndarray
+    times: np.ndarray
+    hourly: np.ndarray
+
+
+# daily aggregations applied to hourly variables, unknown variables use "mean"
+DAILY_AGGREGATIONS = {
+    "temperature_2m": ["mean", "min", "max"],
+    "rain": ["sum"],
+    "precipitation_probability": ["max"],
+}
+
+# (fetched at, hourly payload) per (url, lat, lon, period, features), shared by
+# all threads and sessions
+_location_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_location_cache_lock = threading.Lock()
+_LOCATION_CACHE_SIZE = 4096
+# archive payloads never change, the forecast is updated hourly upstream
+_FORECAST_TTL_S = 900
+
+
+def _fetch_locations(url: str, coords: np.ndarray, params: Dict) -> List[dict]:
+    """Fetch the hourly payload of several coordinates in one request."""
+    OPEN_METEO_LIMITER.acquire()
+    response = requests.get(
+        url,
+        params={
+            "latitude": ",".join(f"{lat:g}" for lat in coords[:, 0]),
+            "longitude": ",".join(f"{lon:g}" for lon in coords[:, 1]),
+            **params,
+        },
+        timeout=_REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    body = response.json()
+    # a single coordinate returns an object instead of a list
+    return body if isinstance(body, list) else [body]
+
+
+def get_multi_location_weather(
+    coords,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    feature_list: List[str] = ["temperature_2m", "rain"],
+    batch_size: int = 100,
+    precision: int = 2,
+    refresh: bool = False,
+) -> StationWeather:
+    """
+    Get daily weather features for many coordinates from open-meteo.com
+
+    Coordinates are rounded to `precision` decimals and deduplicated, then
+    requested `batch_size` at a time using comma separated coordinate
+    lists. Hourly payloads are cached per location, so repeated calls only
+    request coordinates that were not fetched before. Cached forecasts
+    expire after 15 minutes, archive periods do not expire.
+
+    Parameters
+    ----------
+    coords: array-like
+        (lat, lon) pairs, shape (n, 2).
+    start_date: str, optional
+        Start date (YYYY-MM-DD) of the ERA5 archive period. When no dates
+        are given the 7 day forecast is fetched instead.
+    end_date: str, optional
+        End date (YYYY-MM-DD) of the ERA5 archive period.
+    feature_list: list
+        Hourly variables, aggregated per day with `DAILY_AGGREGATIONS`.
+    batch_size: int
+        Maximum number of coordinates per request.
+    precision: int
+        Number of decimals used to deduplicate coordinates.
+    refresh: bool
+        Ignore cached payloads, e.g. to pick up a new forecast run.
+
+    Returns
+    -------
+    station_weather: StationWeather
+        Daily features of shape (stations, days, features).
+
+    Examples
+    --------
+    >>> from utils import get_multi_location_weather
+    >>> sw = get_multi_location_weather(
+    ...     [(52.38, 4.90), (52.09, 5.11), (52.38, 4.90)],
+    ...     start_date="2022-01-01",
+    ...     end_date="2022-01-31",
+    ... )
+    >>> sw.values.shape
+    (2, 31, 4)
+
+    """
+    coords = np.round(np.asarray(coords, dtype=float).reshape(-1, 2), precision)
+    unique, index = np.unique(coords, axis=0, return_inverse=True)
+
+    forecast = start_date is None and end_date is None
+    if forecast:
+        url = OPEN_METEO_FORECAST_URL
+        params = {"hourly": ",".join(feature_list)}
+    else:
+        url = OPEN_METEO_ARCHIVE_URL
+        params = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "hourly": ",".join(feature_list),
+        }
+    keys = [
+        (url, lat, lon, start_date, end_date, tuple(feature_list))
+        for lat, lon in unique
+    ]
+    ttl = _FORECAST_TTL_S if forecast else np.inf
+
+    # keep references to the payloads, other threads may evict them meanwhile
+    payloads = {}
+    with _location_cache_lock:
+        now = time.monotonic()
+        for key in keys:
+            entry = _location_cache.get(key)
+            if not refresh and entry is not None and now - entry[0] <= ttl:
+                payloads[key] = entry[1]
+    missing = [i for i, key in enumerate(keys) if key not in payloads]
+    for offset in range(0, len(missing), batch_size):
+        batch = missing[offset : offset + batch_size]
+        fetched = _fetch_locations(url, unique[batch], params)
+        with _location_cache_lock:
+            now = time.monotonic()
+            for i, payload in zip(batch, fetched):
+                payloads[keys[i]] = payload["hourly"]
+                _location_cache[keys[i]] = (now, payload["hourly"])
+    with _location_cache_lock:
+        for key in keys:
+            if key in _location_cache:
+                _location_cache.move_to_end(key)
+        while len(_location_cache) > _LOCATION_CACHE_SIZE:
+            _location_cache.popitem(last=False)
+    hourly = [payloads[key] for key in keys]
+
+    times = pd.to_datetime(hourly[0]["time"])
+    n_days = len(times) // 24
+    hourly_values = np.stack(
+        [
+            np.array([h[feature][: n_days * 24] for h in hourly], dtype=float)
+            for feature in feature_list
+        ],
+        axis=-1,
+    )
+    features, values = [], []
+    for i, feature in enumerate(feature_list):
+        # (stations, hours) -> (stations, days, 24) for vectorized daily reductions
+        series = hourly_values[:, :, i].reshape(len(unique), n_days, 24)
+        for how in DAILY_AGGREGATIONS.get(feature, ["mean"]):
+            features.append(f"{feature}_{how}")
+            values.append(getattr(np, f"nan{how}")(series, axis=2))
+
+    return StationWeather(
+        coords=unique,
+        dates=times[: n_days * 24 : 24].date,
+        features=features,
+        values=np.stack(values, axis=-1),
+        index=index.ravel(),
+        times=times[: n_days * 24].to_numpy(),
+        hourly=hourly_values,
+    )
+
+
+def get_station_coordinates() -> pd.DataFrame:
+    """
+    Get the coordinates of all stations from the NS API.
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Data frame indexed by station code with the columns "lat" and "lon".
+
+    """
+    hdr = _ns_headers()
+    url = f"{NS_API_URL}/api/v2/stations"
+    NS_API_LIMITER.acquire()
+    response = requests.get(url, headers=hdr, timeout=_REQUEST_TIMEOUT)
+    return (
+        pd.DataFrame(response.json()["payload"])
+        .rename(columns={"lng": "lon"})
+        .set_index("code")
+        .loc[:, ["lat", "lon"]]
+    )
+
+
+def get_disruption_prediction(data):
+    """
+    Get disruption prediction from the model API.
+
+    Parameters
+    ----------
+    dict_data: pd.Series
+        Dictionary containing the data to be used for the prediction.
+
+    Returns
+    -------
+    pred: float
+        The predicted probability of disruption.
+
+    """
+    try:
+        response = requests.post(
+            # "http://127.0.0.1:8000/predict_prepped_data",
+            "http://localhost:8000/predict_prepped_data",
+            data=data.to_json(),
+        )
+        print("option 1")
+    except:
+        try:
+            response = requests.post(
+                "http://localhost:30252/predict_prepped_data",
+                data=data.to_json(),
+            )
+            print("option 2")
+        except:
+            try:
+                response = requests.post(
+                    # "http://10.103.226.248:8000/predict_prepped_data",
+                    # "http://10.106.228.98:8000/predict_prepped_data",
+                    "http://10.96.115.95:8000/predict_prepped_data",
+                    data=data.to_json(),
+                )
+                print("option 3")
+            except:
+                print("Could not connect to model API")
+    
+    return pd.DataFrame(response.json(), index=[0])
+
+
+@coalesce()
+def get_location_prediction(lat: float, lon: float, url: str = MODEL_API_URL):
+    """
+    Get the forecast and the predictions of all forecast days of a location.
+
+    The model api fetches the forecast, builds the daily features and
+    predicts every day in one request, see `/predict_location`.
+
+    Parameters
+    ----------
+    lat: float
+        Latitude of the location.
+    lon: float
+        Longitude of the location.
+    url: str
+        Base url of the model api.
+
+    Returns
+    -------
+    result: Tuple[pd.DataFrame, pd.DataFrame]
+        The hourly forecast (like `get_current_and_forecast`) and the daily
+        features with a "prediction" column, like `lookup_prediction`.
+
+    Examples
+    --------
+    >>> from utils import get_location_prediction
+    >>> hourly_df, features_prediction_df = get_location_prediction(52.31, 4.95)
+
+    """
+    response = requests.get(
+        f"{url}/predict_location", params={"lat": lat, "lon": lon}, timeout=30
+    )
+    response.raise_for_status()
+    body = response.json()
+    features_prediction_df = pd.DataFrame(body["daily"]).assign(
+        date=lambda x: pd.to_datetime(x["date"]).dt.date
+    )
+    return pd.DataFrame(body["hourly"]), features_prediction_df
+
+
+@coalesce(limiter=NS_API_LIMITER)
+def get_amount_disruptions_NS():
+    hdr = _ns_headers()
+    url = f"{NS_API_URL}/api/v3/disruptions?isActive=false"
+    response = requests.get(url, headers=hdr, timeout=_REQUEST_TIMEOUT)
+    logger.debug("NS disruptions: status %s", response.status_code)
+
+    body_list = []
+    skipped = 0
+    for x in response.json():
+        try:
+            body_list.append(
+                (
+                    x["id"],
+                    x["title"],
+                    x["start"],
+                    x["end"],
+                    x["timespans"][0]["cause"]["label"],
+                )
+            )
+        except (KeyError, IndexError, TypeError):
+            skipped += 1
+    if skipped:
+        logger.warning("NS disruptions: skipped %d without id, times or cause", skipped)
+
+    now = pd.Timestamp.now(tz="Europe/Amsterdam")
+    df = pd.DataFrame(
+        body_list,
+        columns=["id", "title", "start", "end", "cause"],
+    ).assign(
+        **{
+            "start": lambda x: pd.to_datetime(x["start"], utc=True).dt.tz_convert(
+                now.tz
+            ),
+            # disruptions that are still going on count until now
+            "end": lambda x: pd.to_datetime(x["end"], utc=True)
+            .dt.tz_convert(now.tz)
+            .fillna(now),
+        }
+    )
+
+    # only the part of a disruption that falls on today counts, also for
+    # disruptions that started yesterday or end tomorrow
+    # the Amsterdam day, not the server's, e.g. in a UTC container after 22:00
+    today = str(now.date())
+    amount_disruptions_NS = interval_minutes(
+        df["start"], df["end"], first=today, last=today
+    ).sum()
+    return round(amount_disruptions_NS, 2)
@@ -0,0 +1,144 @@
+import copy
+import functools
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The first caller of a key runs the function, callers that arrive while
+    it is running wait for and receive its result (or exception) instead of
+    issuing an identical upstream request. Every caller gets a deep copy of
+    the result, so callers can mutate what they receive.
+
+    Parameters
+    ----------
+    wait_timeout: float, optional
+        Seconds a caller waits for the running call before it gives up with
+        a `TimeoutError`, so a hung upstream connection does not block
+        every caller of the key. None waits indefinitely.
+
+    Examples
+    --------
+    >>> group = SingleFlight()
+    >>> group.do(("forecast", 52.37, 4.89), get_current_and_forecast)
+
+    """
+
+    def __init__(self, wait_timeout: Optional[float] = None):
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                raise TimeoutError(
+                    f"Coalesced call {key!r} did not finish in {self.wait_timeout}s"
+                )
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        # every caller, the leader included, gets its own deep copy: results
+        # like (hourly_df, daily_df) tuples hold frames callers may mutate
+        return copy.deepcopy(call.result)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class TokenBucket:
+    """Thread safe token bucket rate limiter.
+
+    Parameters
+    ----------
+    rate: float
+        Tokens added per second, i.e. the sustained request rate.
+    capacity: float
+        Maximum burst size.
+
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """Wait until `tokens` are available, False if `timeout` passed first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+# process wide group shared by all coalesced functions (and streamlit sessions),
+# callers wait a bit longer than one request of the clients may take
+flights = SingleFlight(wait_timeout=90)
+
+
+def coalesce(limiter: Optional[TokenBucket] = None, group: SingleFlight = flights):
+    """Decorator: concurrent identical calls share one rate limited call.
+
+    Calls are identical when the function and its arguments are equal.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (
+                fn.__module__,
+                fn.__qualname__,
+                repr(args),
+                repr(sorted(kwargs.items())),
+            )
+
+            def call():
+                if limiter is not None:
+                    limiter.acquire()
+                return fn(*args, **kwargs)
+
+            return group.do(key, call)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,99 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+from typing import Union, Optional, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
+
+# schema of the rijdendetreinen.nl disruption exports in data/*.csv
+_category = pa.dictionary(pa.int32(), pa.string())
+DISRUPTIONS_SCHEMA = {
+    "rdt_id": pa.int32(),
+    "ns_lines": _category,
+    "rdt_lines": _category,
+    "rdt_lines_id": _category,
+    "rdt_station_names": _category,
+    "rdt_station_codes": _category,
+    "cause_nl": _category,
+    "cause_en": _category,
+    "statistical_cause_nl": _category,
+    "statistical_cause_en": _category,
+    "cause_group": _category,
+    "start_time": pa.timestamp("s"),
+    "end_time": pa.timestamp("s"),
+    # float so that ongoing disruptions (no end_time) can be NaN
+    "duration_minutes": pa.float32(),
+}
+DISRUPTIONS_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def read_disruptions_csv(path: str) -> pa.Table:
+    """
+    Read a single disruptions csv into an Arrow table using the fixed schema.
+
+    Parameters
+    ----------
+    path: str
+        Path of the csv file.
+
+    Returns
+    -------
+    table: pa.Table
+        Arrow table with the columns and types of `DISRUPTIONS_SCHEMA`.
+
+    """
+    return pv.read_csv(
+        path,
+        read_options=pv.ReadOptions(use_threads=True),
+        convert_options=pv.ConvertOptions(
+            column_types=DISRUPTIONS_SCHEMA,
+            include_columns=list(DISRUPTIONS_SCHEMA),
+            include_missing_columns=True,
+            strings_can_be_null=True,
+            timestamp_parsers=[DISRUPTIONS_DATETIME_FORMAT],
+        ),
+    )
+
+
+def load_disruptions(
+    paths: Union[str, Iterable[str]] = "data/*.csv",
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Load the disruption csv files into one typed data frame.
+
+    The files are parsed in parallel with Arrow, the cause, line and
+    station columns become categoricals, `start_time`/`end_time` are
+    parsed once with a fixed format and the numeric columns are downcast.
+
+    Parameters
+    ----------
+    paths: str, Iterable[str]
+        Glob pattern or list of csv paths.
+    max_workers: int, optional
+        Number of files read concurrently, defaults to one per file.
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Data frame containing all disruptions.
+
+    Examples
+    --------
+    >>> from utils import load_disruptions
+    >>> df = load_disruptions("data/*.csv")
+    >>> df.dtypes
+
+    """
+    files = sorted(glob(paths)) if isinstance(paths, str) else list(paths)
+    if not files:
+        raise FileNotFoundError(f"No disruption files found for {paths}")
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(files)) as pool:
+        tables = list(pool.map(read_disruptions_csv, files))
+
+    return (
+        pa.concat_tables(tables)
+        .unify_dictionaries()
+        .to_pandas(split_blocks=True, self_destruct=True)
+    )
@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Tuple
+
+
+def _bucket_starts(n: int, n_buckets: int) -> np.ndarray:
+    """First index of each of `n_buckets` (nearly) equal buckets over `n`."""
+    return np.unique(np.linspace(0, n, n_buckets, endpoint=False).astype(np.int64))
+
+
+def _bucket_arg(values: np.ndarray, starts: np.ndarray, ufunc) -> np.ndarray:
+    """Index of the first extreme (`np.fmin` or `np.fmax`) of every bucket.
+
+    Buckets containing only NaN are skipped.
+    """
+    counts = np.diff(np.append(starts, len(values)))
+    extreme = ufunc.reduceat(values, starts)
+    hit = np.flatnonzero(values == np.repeat(extreme, counts))
+    bucket = np.repeat(np.arange(len(starts)), counts)[hit]
+    _, first = np.unique(bucket, return_index=True)
+    return hit[first]
+
+
+def minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    Min/max decimation of a series.
+
+    The series is split into `n_buckets` buckets and the position of the
+    minimum and the maximum of every bucket is kept, so peaks survive the
+    decimation. With one bucket per pixel the line looks exactly like the
+    full series.
+
+    Parameters
+    ----------
+    y: np.ndarray
+        Values of the series, NaN is ignored.
+    n_buckets: int
+        Number of buckets, usually the plot width in pixels.
+
+    Returns
+    -------
+    indices: np.ndarray
+        Sorted positions of the kept points, at most 2 * `n_buckets`.
+
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) <= 2 * n_buckets:
+        return np.flatnonzero(~np.isnan(y))
+    starts = _bucket_starts(len(y), n_buckets)
+    return np.union1d(_bucket_arg(y, starts, np.fmin), _bucket_arg(y, starts, np.fmax))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets decimation of a series.
+
+    Keeps the first and last point and from every bucket in between the
+    point forming the largest triangle with the point kept in the previous
+    bucket and the mean of the next bucket. Gives visually smoother lines
+    than `minmax_indices` with fewer points.
+
+    Parameters
+    ----------
+    x: np.ndarray
+        Increasing positions of the series, datetimes are allowed.
+    y: np.ndarray
+        Values of the series without NaN.
+    n_out: int
+        Number of points to keep.
+
+    Returns
+    -------
+    indices: np.ndarray
+        Sorted positions of the kept points.
+
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x)
+    x = (x.astype(np.int64) if x.dtype.kind == "M" else x).astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # buckets of the inner points, the first and last point are always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    next_x = np.append(np.add.reduceat(x[1:-1], edges[:-1] - 1), x[-1])
+    next_y = np.append(np.add.reduceat(y[1:-1], edges[:-1] - 1), y[-1])
+    sizes = np.append(np.diff(edges), 1)
+    next_x, next_y = next_x / sizes, next_y / sizes
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # twice the triangle area with the previous point and next bucket mean
+        area = np.abs(
+            (x[a] - next_x[i + 1]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (next_y[i + 1] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+class MultiResolution:
+    """Precomputed min/max/mean aggregates of a time series at several resolutions.
+
+    Level 0 holds the data itself, every next level aggregates `factor`
+    buckets of the previous one. A query picks the finest level that has
+    at most `factor` points per pixel in the requested window and decimates
+    that to the pixel width, so the cost of a query depends on the plot
+    width and not on the length of the history.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data frame with a time column and numeric feature columns, like the
+        output of `get_historical_weather`.
+    time_col: str
+        Name of the time column.
+    factor: int
+        Number of buckets aggregated per level.
+    min_points: int
+        No coarser levels are built once a level has fewer points.
+
+    Examples
+    --------
+    >>> his_df = get_historical_weather(start_date="2013-01-01", end_date="2022-12-31")
+    >>> pyramid = MultiResolution(his_df)
+    >>> plot_df = pyramid.query("2020-01-01", "2020-06-30", width=1200)
+
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        time_col: str = "time",
+        factor: int = 4,
+        min_points: int = 1000,
+    ):
+        self.features: List[str] = [c for c in df.columns if c != time_col]
+        self.factor = factor
+        df = df.assign(**{time_col: pd.to_datetime(df[time_col])}).sort_values(time_col)
+        values = df[self.features].to_numpy(dtype=np.float64)
+        counts = (~np.isnan(values)).astype(np.int64)
+        level = {
+            "time": df[time_col].to_numpy(),
+            "min": values,
+            "max": values,
+            "sum": np.nan_to_num(values),
+            "count": counts,
+        }
+        self.levels = [level]
+        while len(level["time"]) > min_points:
+            starts = np.arange(0, len(level["time"]), factor)
+            level = {
+                "time": level["time"][starts],
+                "min": np.fmin.reduceat(level["min"], starts, axis=0),
+                "max": np.fmax.reduceat(level["max"], starts, axis=0),
+                "sum": np.add.reduceat(level["sum"], starts, axis=0),
+                "count": np.add.reduceat(level["count"], starts, axis=0),
+            }
+            self.levels.append(level)
+
+    def level_for(self, start, end, width: int) -> Tuple[int, slice]:
+        """Finest level with at most `factor` points per pixel in the window."""
+        for number, level in enumerate(self.levels):
+            window = slice(
+                np.searchsorted(level["time"], start, side="left"),
+                np.searchsorted(level["time"], end, side="right"),
+            )
+            if window.stop - window.start <= width * self.factor:
+                return number, window
+        return number, window
+
+    def query(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        width: int = 1200,
+        method: str = "minmax",
+    ) -> pd.DataFrame:
+        """
+        Decimated series of a time window.
+
+        Parameters
+        ----------
+        start: str, optional
+            Start of the window, by default the start of the data.
+        end: str, optional
+            End of the window, by default the end of the data.
+        width: int
+            Plot width in pixels, about 2 * `width` points are returned per
+            feature with "minmax" and `width` with "lttb".
+        method: str
+            "minmax" keeps the extremes of every bucket, "lttb" keeps the
+            visually most important points of the bucket means.
+
+        Returns
+        -------
+        plot_df: pd.DataFrame
+            Long data frame with the columns "time", "variable" and "value",
+            ready for `px.line(..., render_mode="webgl")`.
+
+        """
+        times = self.levels[0]["time"]
+        start = np.datetime64(pd.Timestamp(start)) if start is not None else times[0]
+        end = np.datetime64(pd.Timestamp(end)) if end is not None else times[-1]
+        number, window = self.level_for(start, end, width)
+        level = {key: values[window] for key, values in self.levels[number].items()}
+
+        frames = []
+        for j, feature in enumerate(self.features):
+            if method == "lttb":
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    mean = level["sum"][:, j] / level["count"][:, j]
+                keep = np.flatnonzero(~np.isnan(mean))
+                keep = keep[lttb_indices(level["time"][keep], mean[keep], width)]
+                time, value = level["time"][keep], mean[keep]
+            elif method == "minmax":
+                lo, hi = level["min"][:, j], level["max"][:, j]
+                if number == 0:
+                    keep = minmax_indices(lo, width)
+                    time, value = level["time"][keep], lo[keep]
+                else:
+                    if len(lo) > width:
+                        starts = _bucket_starts(len(lo), width)
+                        i_lo = _bucket_arg(lo, starts, np.fmin)
+                        i_hi = _bucket_arg(hi, starts, np.fmax)
+                    else:
+                        i_lo = np.flatnonzero(~np.isnan(lo))
+                        i_hi = i_lo
+                    order = np.argsort(np.concatenate([i_lo, i_hi]), kind="stable")
+                    time = np.concatenate([level["time"][i_lo], level["time"][i_hi]])
+                    value = np.concatenate([lo[i_lo], hi[i_hi]])
+                    time, value = time[order], value[order]
+            else:
+                raise ValueError(f"Unknown method {method!r}, use 'minmax' or 'lttb'")
+            frames.append(
+                pd.DataFrame({"time": time, "variable": feature, "value": value})
+            )
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+from typing import Iterable
+from .clients import StationWeather
+
+def aggregate_station_weather(
+    station_weather: StationWeather,
+    station_codes: pd.DataFrame,
+    regions: Iterable[str],
+) -> np.ndarray:
+    """
+    Average station weather over the stations of each disruption region.
+
+    Parameters
+    ----------
+    station_weather: StationWeather
+        Output of `get_multi_location_weather` for the rows of
+        `station_codes`.
+    station_codes: pd.DataFrame
+        Data frame indexed by station code, in the order the coordinates
+        were passed to `get_multi_location_weather`.
+    regions: Iterable[str]
+        Comma separated station codes per region, like the
+        `rdt_station_codes` column ("HGL, HGLO, ODZ").
+
+    Returns
+    -------
+    region_values: np.ndarray
+        Array of shape (regions, days, features). Regions without any known
+        station are NaN.
+
+    Examples
+    --------
+    >>> stations = get_station_coordinates()
+    >>> sw = get_multi_location_weather(
+    ...     stations[["lat", "lon"]].to_numpy(), "2021-01-01", "2021-12-31"
+    ... )
+    >>> regions = df["rdt_station_codes"].cat.categories
+    >>> region_values = aggregate_station_weather(sw, stations, regions)
+
+    """
+    from scipy import sparse
+
+    regions = pd.Series(list(regions), dtype="object")
+    pairs = (
+        regions.str.split(",")
+        .explode()
+        .str.strip()
+        .map(
+            pd.Series(
+                station_weather.index, index=station_codes.index.astype(str)
+            ).to_dict()
+        )
+        .dropna()
+    )
+    rows = pairs.index.to_numpy()
+    cols = pairs.to_numpy(dtype=int)
+    # station -> weather row membership, row normalised to average per region
+    membership = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)),
+        shape=(len(regions), len(station_weather.coords)),
+    )
+    counts = np.asarray(membership.sum(axis=1)).ravel()
+    membership = sparse.diags(
+        np.divide(1.0, counts, out=np.zeros(len(counts)), where=counts > 0)
+    ) @ membership
+
+    n_stations, n_days, n_features = station_weather.values.shape
+    region_values = membership @ station_weather.values.reshape(n_stations, -1)
+    region_values[counts == 0] = np.nan
+    return region_values.reshape(len(regions), n_days, n_features)
+
+
+def aggregate_daily_weather(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate hourly open-meteo data to the daily features used by the model.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Hourly weather with at least the columns "time", "temperature_2m"
+        and "rain".
+
+    Returns
+    -------
+    daily_df: pd.DataFrame
+        Data frame indexed by date with the columns "temperature_2m_mean",
+        "temperature_2m_min", "temperature_2m_max" and "rain_sum".
+
+    """
+    daily_df = (
+        df.assign(**{"date": lambda x: pd.to_datetime(x["time"]).dt.date})
+        .groupby("date")
+        .agg({"temperature_2m": ["mean", "min", "max"], "rain": "sum"})
+    )
+    daily_df.columns = ["_".join(col) for col in daily_df.columns]
+    return daily_df
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, NamedTuple
+
+
+class AutoRegressiveModel(NamedTuple):
+    """Vector autoregressive model of many series, see `fit_autoregressive`.
+
+    Attributes
+    ----------
+    coef: np.ndarray
+        Coefficients of shape (series, features * lags + 1, features), the
+        last row is the intercept.
+    mean: np.ndarray
+        Mean per series and feature, shape (series, 1, features).
+    std: np.ndarray
+        Standard deviation per series and feature, shape (series, 1, features).
+    lags: int
+        Number of past steps a prediction depends on.
+
+    """
+
+    coef: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    lags: int
+
+
+def _design(z: np.ndarray, lags: int) -> np.ndarray:
+    """Lag windows of (series, time, features) as (series, windows, features * lags + 1)."""
+    windows = sliding_window_view(z, lags, axis=1)  # (S, T - lags + 1, F, lags)
+    x = windows.reshape(*windows.shape[:2], -1)
+    return np.concatenate([x, np.ones((*x.shape[:2], 1), dtype=x.dtype)], axis=2)
+
+
+def fit_autoregressive(
+    values: np.ndarray, lags: int = 24, alpha: float = 1e-3, batch_size: int = 64
+) -> AutoRegressiveModel:
+    """
+    Fit a vector autoregressive model per series in one batched solve.
+
+    Every feature of a series is predicted from the last `lags` values of
+    all its features. The lag matrices are strided views of the data, the
+    ridge regularised normal equations of all series are built with one
+    matrix product and solved together.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        Array of shape (series, time, features), e.g. the `values` of
+        `get_multi_location_weather`. Windows containing NaN are skipped.
+    lags: int
+        Number of past steps used, 24 for a daily cycle in hourly data.
+    alpha: float
+        Ridge penalty on the standardised data, keeps constant series and
+        collinear lags solvable.
+    batch_size: int
+        Number of series whose lag matrices are materialised at once,
+        bounds the memory use.
+
+    Returns
+    -------
+    model: AutoRegressiveModel
+        The fitted coefficients and the standardisation of every series.
+
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.shape[1] <= lags:
+        raise ValueError(f"Need more than {lags} time steps, got {values.shape[1]}")
+    mean = np.nanmean(values, axis=1, keepdims=True)
+    std = np.nanstd(values, axis=1, keepdims=True)
+    std[~(std > 0)] = 1.0
+    z = (values - mean) / std
+
+    n_series, _, n_features = z.shape
+    n_coef = n_features * lags + 1
+    coef = np.empty((n_series, n_coef, n_features))
+    for batch in range(0, n_series, batch_size):
+        zb = z[batch : batch + batch_size]
+        x = _design(zb[:, :-1], lags)
+        y = zb[:, lags:]
+        missing = np.isnan(zb).any(axis=2)
+        if missing.any():
+            # windows with a missing value get zero weight
+            invalid = sliding_window_view(missing, lags + 1, axis=1).any(axis=2)
+            x[invalid], y = 0.0, np.where(invalid[..., None], 0.0, y)
+        gram = np.matmul(x.transpose(0, 2, 1), x) + alpha * np.eye(n_coef)
+        coef[batch : batch + batch_size] = np.linalg.solve(
+            gram, np.matmul(x.transpose(0, 2, 1), y)
+        )
+    return AutoRegressiveModel(coef=coef, mean=mean, std=std, lags=lags)
+
+
+def forecast_autoregressive(
+    model: AutoRegressiveModel, values: np.ndarray, steps: int
+) -> np.ndarray:
+    """
+    Roll a fitted model forward, all series at once.
+
+    Parameters
+    ----------
+    model: AutoRegressiveModel
+        Output of `fit_autoregressive`.
+    values: np.ndarray
+        Array of shape (series, time, features), the last `model.lags`
+        steps are the starting point.
+    steps: int
+        Number of steps to forecast.
+
+    Returns
+    -------
+    forecast: np.ndarray
+        Array of shape (series, steps, features).
+
+    """
+    z = (np.asarray(values, dtype=np.float64) - model.mean) / model.std
+    window = np.nan_to_num(z[:, -model.lags :])  # (S, lags, F)
+    forecast = np.empty((z.shape[0], steps, z.shape[2]))
+    for step in range(steps):
+        # same layout as the design matrix: feature major, then lag
+        x = window.transpose(0, 2, 1).reshape(z.shape[0], -1)
+        x = np.concatenate([x, np.ones((z.shape[0], 1))], axis=1)
+        forecast[:, step] = np.einsum("sk,skf->sf", x, model.coef)
+        window = np.concatenate([window[:, 1:], forecast[:, step, None]], axis=1)
+    return forecast * model.std + model.mean
+
+
+def run_forecast(
+    data: pd.DataFrame,
+    outcome: str,
+    feature_list: List[str],
+    steps: int,
+    lags: int = 24,
+    time_col: str = "time",
+    tail: int = 168,
+) -> pd.DataFrame:
+    """
+    Forecast hourly weather with a vector autoregressive model.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Weather with a time column, like the output of
+        `get_historical_weather`.
+    outcome: str
+        Feature of interest, always part of the forecast.
+    feature_list: List[str]
+        Features the model uses, each is predicted from the past `lags`
+        values of all of them.
+    steps: int
+        Number of time steps (rows of `data`) to forecast.
+    lags: int
+        Number of past steps used.
+    time_col: str
+        Name of the time column.
+    tail: int
+        Number of observed rows included in the output.
+
+    Returns
+    -------
+    forecast_df: pd.DataFrame
+        The last `tail` observed and the `steps` forecasted rows with the
+        columns "index" (time), the features and "type" ("observed" or
+        "forecast").
+
+    Examples
+    --------
+    >>> from utils import get_historical_weather, run_forecast
+    >>> his_df = get_historical_weather()
+    >>> future_df = run_forecast(
+    ...     data=his_df, outcome="temperature_2m",
+    ...     feature_list=["temperature_2m", "rain"], steps=7
+    ... )
+
+    """
+    features = list(dict.fromkeys([outcome, *feature_list]))
+    times = pd.to_datetime(data[time_col])
+    values = data[features].to_numpy(dtype=np.float64)[None]
+
+    model = fit_autoregressive(values, lags=lags)
+    forecast = forecast_autoregressive(model, values, steps)[0]
+
+    step = times.diff().median()
+    observed = (
+        data[features]
+        .iloc[-tail:]
+        .assign(index=times.iloc[-tail:].to_numpy(), type="observed")
+    )
+    future = pd.DataFrame(forecast, columns=features).assign(
+        index=times.iloc[-1] + step * np.arange(1, steps + 1), type="forecast"
+    )
+    return pd.concat([observed, future], ignore_index=True)[
+        ["index", *features, "type"]
+    ]
@@ -0,0 +1,99 @@
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger("dashboard.render")
+if not logger.handlers:
+    # one json object per line on stdout, ready for log aggregation
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# streamlit runs every session in its own script thread
+_local = threading.local()
+
+
+class RenderProfiler:
+    """Times the stages of one dashboard render.
+
+    Stages wrapping a cached function are reported as cache hits unless the
+    body of the cached function calls `note_cache_miss`, which only happens
+    when it actually runs.
+
+    Parameters
+    ----------
+    session_id: str
+        Id of the streamlit session, included in the timing log.
+    enabled: bool
+        When False the stages are not timed and nothing is logged.
+
+    Examples
+    --------
+    >>> profiler = RenderProfiler(session_id)
+    >>> with profiler.stage("fetch", cached=True):
+    ...     df_current = cache_current(latitude, longitude)
+    >>> profiler.log()
+
+    """
+
+    def __init__(self, session_id: str, enabled: bool = True):
+        self.session_id = session_id
+        self.enabled = enabled
+        self.render_id = uuid.uuid4().hex[:12]
+        self.stages: List[Dict] = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, cached: bool = False):
+        if not self.enabled:
+            yield
+            return
+        record = {"stage": name, "ms": None, "cache_hit": True if cached else None}
+        parent = getattr(_local, "stage", None)
+        _local.stage = record
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["ms"] = round((time.perf_counter() - start) * 1000, 2)
+            _local.stage = parent
+            self.stages.append(record)
+
+    def summary(self) -> Dict:
+        """Timings of the render so far, as logged by `log`."""
+        return {
+            "event": "render",
+            "ts": time.time(),
+            "session_id": self.session_id,
+            "render_id": self.render_id,
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 2),
+            "stages": self.stages,
+        }
+
+    def log(self) -> Optional[Dict]:
+        """Write the timings as one json line to the "dashboard.render" logger."""
+        if not self.enabled:
+            return None
+        summary = self.summary()
+        logger.info(json.dumps(summary))
+        return summary
+
+    def frame(self) -> pd.DataFrame:
+        """Stage timings as a frame for the sidebar panel."""
+        return pd.DataFrame(self.stages, columns=["stage", "ms", "cache_hit"])
+
+
+def note_cache_miss():
+    """Mark the running stage as a cache miss, call from a cached body."""
+    record = getattr(_local, "stage", None)
+    if record is not None and record["cache_hit"] is not None:
+        record["cache_hit"] = False
@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+from typing import Union, Optional, Callable, Dict, Iterable
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+def get_scaler(
+    method: Union[str, Optional[Callable]] = "MinMax", kwargs: Dict = {}
+):
+    """
+    Create an unfitted scaler.
+
+    Parameters
+    ----------
+    method: Callable, str
+        The name of the method you wish to use [method options: "MinMax",
+        "Standard"], or an Sklearn transformer.
+    kwargs: Dict
+        Dictionary containing additional keywords to be added to the Scaler.
+
+    Returns
+    -------
+    scaler: sklearn transformer
+        The unfitted scaler.
+
+    """
+    if method == "MinMax":
+        return MinMaxScaler(**kwargs)
+    elif method == "Standard":
+        return StandardScaler(**kwargs)
+    return method(**kwargs)  # type: ignore
+
+
+def partial_fit_scaler(
+    chunks: Iterable[pd.DataFrame],
+    method: Union[str, Optional[Callable]] = "MinMax",
+    kwargs: Dict = {},
+    scaler=None,
+):
+    """
+    Fit a scaler chunk by chunk with `partial_fit`.
+
+    Use this for data that does not fit in memory, e.g. chunks from
+    `pd.read_sql_query(..., chunksize=...)`. The fitted scaler can be
+    passed to `apply_scaling` to transform the chunks afterwards.
+
+    Parameters
+    ----------
+    chunks: Iterable[pd.DataFrame]
+        Chunks with identical columns.
+    method: Callable, str
+        See `get_scaler`, the transformer must implement `partial_fit`.
+    kwargs: Dict
+        Dictionary containing additional keywords to be added to the Scaler.
+    scaler: sklearn transformer, optional
+        An already (partially) fitted scaler to update instead.
+
+    Returns
+    -------
+    scaler: sklearn transformer
+        The fitted scaler.
+
+    Examples
+    --------
+    >>> scaler = partial_fit_scaler(
+    ...     pd.read_sql_query(query, engine, chunksize=100_000)
+    ... )
+    >>> save_scaler(scaler, "model_api/scaler.joblib")
+
+    """
+    scaler = scaler if scaler is not None else get_scaler(method, kwargs)
+    for chunk in chunks:
+        scaler.partial_fit(chunk)
+    return scaler
+
+
+def save_scaler(scaler, path: str = "model_api/scaler.joblib"):
+    """Store a fitted scaler next to the model so serving reuses it."""
+    import joblib
+
+    joblib.dump(scaler, path)
+
+
+def load_scaler(path: str = "model_api/scaler.joblib"):
+    """Load a scaler stored with `save_scaler`."""
+    import joblib
+
+    return joblib.load(path)
+
+
+def _feature_order(scaler, df: pd.DataFrame) -> np.ndarray:
+    """Position in the fitted `scaler` of every column of `df`."""
+    names = getattr(scaler, "feature_names_in_", None)
+    if names is None:
+        n_features = getattr(scaler, "n_features_in_", df.shape[1])
+        if df.shape[1] != n_features:
+            raise ValueError(
+                f"The scaler was fitted on {n_features} columns, got {df.shape[1]}"
+            )
+        return np.arange(df.shape[1])
+    order = pd.Index(names).get_indexer(df.columns)
+    if not np.array_equal(np.sort(order), np.arange(len(names))):
+        raise ValueError(
+            f"Columns {list(df.columns)} do not match the columns the scaler "
+            f"was fitted on {list(names)}"
+        )
+    return order
+
+
+def _scale_values(
+    scaler, values: np.ndarray, df: pd.DataFrame, order: np.ndarray
+) -> np.ndarray:
+    """Scale `values`, a private copy of `df`, without further copies.
+
+    Column i of `values` is scaled with parameter `order[i]` of the scaler,
+    so the columns of `df` may be in any order.
+    """
+    if isinstance(scaler, MinMaxScaler):
+        values *= scaler.scale_[order]
+        values += scaler.min_[order]
+        if scaler.clip:
+            np.clip(values, *scaler.feature_range, out=values)
+    elif isinstance(scaler, StandardScaler):
+        if scaler.with_mean:
+            values -= scaler.mean_[order]
+        if scaler.with_std:
+            values /= scaler.scale_[order]
+    else:
+        # transform in the fitted column order, then restore the order of df
+        values[...] = scaler.transform(df.iloc[:, np.argsort(order)])[:, order]
+    return values
+
+
+def apply_scaling(
+    df: pd.DataFrame,
+    method: Union[str, Optional[Callable]] = "MinMax",
+    kwargs: Dict = {},
+    scaler=None,
+    dtype=np.float64,
+):
+    r"""Utility function to be used in conjunction with pandas pipe()
+    to scale columns of a data frame seperately.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        The data frame you want to scale.
+    method: Callable, str
+        The name of the method you wish to use [method options: "MinMax",
+        "Standard"], or an Sklearn transformer,
+        see: https://scikit-learn.org/stable/modules/preprocessing.html
+    kwargs: Dict
+        Dictionary containing additional keywords to be added to the Scaler.
+    scaler: sklearn transformer, optional
+        An already fitted scaler (see `partial_fit_scaler`, `load_scaler`).
+        When given, `df` is only transformed, e.g. with the parameters
+        learned at training time. Columns are matched by name, a `ValueError`
+        is raised when they differ from the fitted ones.
+    dtype: np.dtype
+        dtype of the result. `df` is copied once into an array of this dtype
+        which is then scaled without further copies, `np.float32` halves the
+        memory of large frames. `df` itself is not modified.
+
+    Returns
+    -------
+    scal_df: pd.DataFrame
+        The scaled data frame.
+
+    Examples
+    --------
+    >>> import seaborn as sns
+    >>> import pandas as pd
+    >>> df = sns.load_dataset("iris")
+    >>> scaled_df = (df
+    ...             .select_dtypes("number")
+    ...             .pipe(apply_scaling)
+    ...             )
+
+    """
+    if scaler is None:
+        scaler = get_scaler(method, kwargs).fit(df)
+
+    values = _scale_values(
+        scaler, df.to_numpy(dtype=dtype, copy=True), df, _feature_order(scaler, df)
+    )
+    return pd.DataFrame(values, index=df.index, columns=df.columns, copy=False)
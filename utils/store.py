@@ -0,0 +1,84 @@
+import pandas as pd
+from typing import Dict
+import json
+import os
+
+PREDICTION_STORE_PATH = os.environ.get("PREDICTION_STORE", "prediction_store.json")
+
+
+def location_key(lat: float, lon: float, precision: int = 2) -> str:
+    """Key of a location in the prediction store."""
+    return f"{lat:.{precision}f},{lon:.{precision}f}"
+
+
+def load_prediction_store(
+    path: str = PREDICTION_STORE_PATH, max_age_hours: float = 3
+) -> Dict:
+    """
+    Load the predictions written by `precompute_predictions.py`.
+
+    Parameters
+    ----------
+    path: str
+        Location of the store.
+    max_age_hours: float
+        Stores older than this are ignored so a stopped job does not keep
+        serving an outdated forecast.
+
+    Returns
+    -------
+    store: Dict
+        The store, or an empty dict if it is missing or outdated.
+
+    """
+    try:
+        with open(path) as f:
+            store = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    age = pd.Timestamp.now(tz="UTC") - pd.Timestamp(store["generated_at"])
+    if age > pd.Timedelta(hours=max_age_hours):
+        return {}
+    return store
+
+
+def lookup_prediction(store: Dict, key: str):
+    """
+    Look up the forecast and predictions of one location in the store.
+
+    Parameters
+    ----------
+    store: Dict
+        Output of `load_prediction_store`.
+    key: str
+        `location_key` of the location, or "NL" for the country average.
+
+    Returns
+    -------
+    result: Tuple[pd.DataFrame, pd.DataFrame], optional
+        The hourly forecast (like `get_current_and_forecast`) and the daily
+        features with a "prediction" column, or None if the location is
+        not in the store.
+
+    Examples
+    --------
+    >>> store = load_prediction_store()
+    >>> result = lookup_prediction(store, location_key(52.31, 4.95))
+
+    """
+    entry = store.get("locations", {}).get(key)
+    if entry is None:
+        return None
+    hourly_df = pd.DataFrame(
+        entry["hourly"], columns=store["hourly_features"]
+    ).assign(time=store["times"])
+    features_prediction_df = pd.DataFrame(
+        entry["features"], columns=store["features"]
+    ).assign(
+        date=pd.to_datetime(store["dates"]).date,
+        prediction=entry["predictions"],
+    )
+    return (
+        hourly_df[["time", *store["hourly_features"]]],
+        features_prediction_df[["date", *store["features"], "prediction"]],
+    )
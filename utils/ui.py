@@ -0,0 +1,57 @@
+import streamlit as st
+
+# create a color palette
+segmented_palette = ["#D81B60", "#1E88E5", "#FFC107", "#944EBC", "#004D40"]
+
+
+def check_password():
+    """Returns `True` if the user had the correct password.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    bool
+        `True` if the user had the correct password, `False` otherwise.
+
+    Examples
+    --------
+    >>> import streamlit as st
+    >>> from utils import check_password
+    >>> check_password()
+
+    """
+
+    def password_entered():
+        """Checks whether a password entered by the user is correct."""
+        if (
+            st.session_state["username"] in st.secrets["passwords"]
+            and st.session_state["password"]
+            == st.secrets["passwords"][st.session_state["username"]]
+        ):
+            st.session_state["password_correct"] = True
+            del st.session_state["password"]  # don't store username + password
+            del st.session_state["username"]
+        else:
+            st.session_state["password_correct"] = False
+
+    if "password_correct" not in st.session_state:
+        # First run, show inputs for username + password.
+        st.text_input("Username", on_change=password_entered, key="username")
+        st.text_input(
+            "Password", type="password", on_change=password_entered, key="password"
+        )
+        return False
+    elif not st.session_state["password_correct"]:
+        # Password not correct, show input + error.
+        st.text_input("Username", on_change=password_entered, key="username")
+        st.text_input(
+            "Password", type="password", on_change=password_entered, key="password"
+        )
+        st.error("😕 User not known or password incorrect")
+        return False
+    else:
+        # Password correct.
+        return True
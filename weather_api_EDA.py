@@ -1,6 +1,8 @@
 # %%
+import numpy as np
 import plotly.express as px
 from utils import (
+    MultiResolution,
     apply_scaling,
     get_current_and_forecast,
     get_historical_weather,
@@ -27,17 +29,19 @@ px.line(
 # %%
 his_df = get_historical_weather()
 # %%
-plot_df = his_df.melt(id_vars=["time"])
+# decimated to the plot width, query a window to zoom in
+plot_df = MultiResolution(his_df).query(width=1200)
 px.line(
     plot_df,
     x="time",
     y="value",
     color="variable",
+    render_mode="webgl",
     color_discrete_sequence=segmented_palette,
 )
 # %%
 px.imshow(
-    his_df.set_index("time").pipe(apply_scaling).T,
+    his_df.set_index("time").pipe(apply_scaling, dtype=np.float32).T,
     aspect="auto",
     color_continuous_scale="RdBu_r",
 )